@@ -6,7 +6,7 @@ Principais responsabilidades:
  - Resolver dependências com dependency.DependencyGraph (ordem topológica)
  - Para cada pacote (dependências + alvo): construir no sandbox com sandbox.build_port
  - Empacotar com packager.package_from_metadata
- - Atualizar DB de instalados (/pyport/db/installed.json) com arquivos, versão e pacote
+ - Atualizar DB de instalados (/pyport/db/installed.sqlite, via installdb) com arquivos, versão e pacote
  - Gerar logs detalhados por pacote em /pyport/logs/build-<pkg>.log
  - Oferecer opções: keep_build, dry_run, force, toolchain_dir, chroot
 """
@@ -19,14 +19,29 @@ import shutil
 import argparse
 import traceback
 import time
+import threading
+import queue
+import atexit
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple, IO
 
 # imports dos outros módulos do pyport (assume que estão no PYTHONPATH)
 try:
     import yaml  # type: ignore
+    try:
+        from yaml import CSafeLoader as _YamlLoader  # libyaml backend
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader  # type: ignore
 except Exception:
     yaml = None  # parser fallback handled below
+    _YamlLoader = None
+
+try:
+    import orjson  # type: ignore  # faster JSON for package metadata
+except Exception:
+    orjson = None
 
 try:
     import sandbox  # module with build_port(...)
@@ -43,78 +58,301 @@ try:
 except Exception:
     dependency = None
 
+# DB de instalados compartilhado com core.py/remove.py (SQLite; importa o installed.json legado)
+try:
+    from pyport.installdb import open_installed_db
+except Exception:
+    from installdb import open_installed_db  # type: ignore
+
 # Paths/config
 PORTFILES_ROOT = Path("/usr/ports")
 DB_DIR = Path("/pyport/db")
 LOG_DIR = Path("/pyport/logs")
 PACKAGES_DIR = Path("/pyport/packages")
 
-DB_DIR.mkdir(parents=True, exist_ok=True)
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-PACKAGES_DIR.mkdir(parents=True, exist_ok=True)
 
-INSTALLED_DB = DB_DIR / "installed.json"
+def _ensure_dirs(*dirs: Path) -> None:
+    """Cria os diretórios ausentes, com uma única leitura por diretório pai."""
+    by_parent: Dict[Path, List[Path]] = {}
+    for d in dirs:
+        by_parent.setdefault(d.parent, []).append(d)
+    for parent, children in by_parent.items():
+        try:
+            with os.scandir(parent) as it:
+                existing = {e.name for e in it if e.is_dir()}
+        except FileNotFoundError:
+            existing = set()
+        for d in children:
+            if d.name not in existing:
+                d.mkdir(parents=True, exist_ok=True)
+
+
+# /pyport/{db,logs,packages} share a parent: one scandir instead of three mkdir -p
+_ensure_dirs(DB_DIR, LOG_DIR, PACKAGES_DIR)
+
+# cache do grafo de dependências e das ordens resolvidas (invalidado quando os portfiles mudam)
+_GRAPH_CACHE: Dict[str, Any] = {"mtime_sig": None, "graph": None, "orders": {}}
+
+# índice name -> portfile.yaml (persistido em disco e mantido em memória)
+PORT_INDEX = DB_DIR / "portindex.json"
+_PORT_INDEX_CACHE: Dict[str, Any] = {"sig": None, "index": {}}
 
 
 def _now_ts() -> str:
     return time.strftime("%Y-%m-%d %H:%M:%S")
 
 
+# per-package log handles kept open for the build's lifetime; writes are
+# drained by a daemon thread so disk I/O overlaps the build
+_LOG_HANDLES: Dict[str, IO[str]] = {}
+_LOG_LOCK = threading.Lock()
+_LOG_QUEUE: "queue.Queue[Tuple[IO[str], str]]" = queue.Queue()
+_LOG_WRITER: Optional[threading.Thread] = None
+
+
+def _log_writer() -> None:
+    while True:
+        fh, line = _LOG_QUEUE.get()
+        try:
+            fh.write(line)
+            if _LOG_QUEUE.empty():
+                fh.flush()
+        except Exception:
+            pass
+        finally:
+            _LOG_QUEUE.task_done()
+
+
+def _log_handle(pkg: str) -> IO[str]:
+    global _LOG_WRITER
+    with _LOG_LOCK:
+        fh = _LOG_HANDLES.get(pkg)
+        if fh is None:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+            fh = open(LOG_DIR / f"build-{pkg}.log", "a", encoding="utf-8")
+            _LOG_HANDLES[pkg] = fh
+        if _LOG_WRITER is None:
+            _LOG_WRITER = threading.Thread(target=_log_writer, name="pyport-log", daemon=True)
+            _LOG_WRITER.start()
+        return fh
+
+
+def flush_logs() -> None:
+    """
+    Aguarda a fila de log esvaziar e faz flush de todos os arquivos abertos.
+    """
+    _LOG_QUEUE.join()
+    with _LOG_LOCK:
+        for fh in _LOG_HANDLES.values():
+            try:
+                fh.flush()
+            except Exception:
+                pass
+
+
+def _close_logs() -> None:
+    flush_logs()
+    with _LOG_LOCK:
+        for fh in _LOG_HANDLES.values():
+            try:
+                fh.close()
+            except Exception:
+                pass
+        _LOG_HANDLES.clear()
+
+
+atexit.register(_close_logs)
+
+
 def _log(pkg: str, message: str) -> None:
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    out = LOG_DIR / f"build-{pkg}.log"
     ts = _now_ts()
     line = f"[{ts}] {message}\n"
-    with open(out, "a", encoding="utf-8") as f:
-        f.write(line)
+    _LOG_QUEUE.put((_log_handle(pkg), line))
     print(f"[{pkg}] {message}")
 
 
+def _json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _log_traceback(pkg: str, options: Dict[str, Any]) -> None:
+    # format_exc walks frames and reads source files: only pay for it in debug mode
+    if options.get("debug"):
+        _log(pkg, traceback.format_exc())
+
+
+def _installed_db():
+    # mesmo DB (SQLite em DB_DIR) lido por core.py e remove.py
+    return open_installed_db(DB_DIR)
+
+
 def load_installed_db() -> Dict[str, Any]:
+    """
+    Carrega o DB de instalados inteiro (name -> entrada).
+    """
     try:
-        if INSTALLED_DB.exists():
-            return json.loads(INSTALLED_DB.read_text(encoding="utf-8"))
+        return _installed_db().all()
     except Exception:
-        pass
-    return {}
+        return {}
 
 
 def save_installed_db(db: Dict[str, Any]) -> None:
-    INSTALLED_DB.write_text(json.dumps(db, indent=2), encoding="utf-8")
+    _installed_db().replace_all(db)
+
+
+_PLAIN_SCALAR_STOP = (b"'", b'"', b"#", b"{", b"[", b"&", b"*", b"!", b"|", b">")
+
+
+def _read_portfile_name(pf: Path) -> Optional[str]:
+    """
+    Lê apenas o campo name de um portfile (None se ilegível ou sem nome).
+    Um name escalar simples é lido direto dos bytes, sem invocar o parser YAML.
+    """
+    try:
+        data = pf.read_bytes()
+    except OSError:
+        return None
+
+    # locate a top-level "name:" key before paying for a full parse
+    if data.startswith(b"name:"):
+        pos = 0
+    else:
+        pos = data.find(b"\nname:")
+        if pos < 0:
+            return None
+        pos += 1
+    end = data.find(b"\n", pos)
+    value = data[pos + 5:end if end >= 0 else len(data)].strip()
+    if value and not any(tok in value for tok in _PLAIN_SCALAR_STOP):
+        return value.decode("utf-8", "replace")
+    if not yaml:
+        return value.strip(b"'\"").decode("utf-8", "replace") or None
+
+    try:
+        meta = yaml.load(data, Loader=_YamlLoader)
+    except Exception:
+        return None
+    if not isinstance(meta, dict):
+        return None
+    name = meta.get("name")
+    return str(name) if name else None
+
+
+def _iter_portfiles(root: Path):
+    """
+    Percorre root com os.scandir e produz os DirEntry de cada portfile.yaml.
+    O tipo de cada entrada vem da própria leitura do diretório (sem stat extra).
+    """
+    stack = [str(root)]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif e.name == "portfile.yaml":
+                        yield e
+        except OSError:
+            continue
+
+
+def _ports_tree_signature() -> List[List[Any]]:
+    """
+    mtime_ns de PORTFILES_ROOT e de cada subdiretório imediato (categorias);
+    adicionar/remover um port altera o mtime do diretório pai.
+    """
+    sig: List[List[Any]] = []
+    try:
+        sig.append([".", PORTFILES_ROOT.stat().st_mtime_ns])
+        for d in sorted(PORTFILES_ROOT.iterdir()):
+            if d.is_dir():
+                sig.append([d.name, d.stat().st_mtime_ns])
+    except OSError:
+        pass
+    return sig
+
+
+def _load_or_build_port_index(rebuild: bool = False) -> Dict[str, str]:
+    """
+    Retorna o índice name -> caminho do portfile.yaml, persistido em PORT_INDEX.
+    O índice é reconstruído (uma única varredura da árvore) quando a assinatura muda.
+    """
+    sig = _ports_tree_signature()
+    if not rebuild:
+        if _PORT_INDEX_CACHE["sig"] == sig:
+            return _PORT_INDEX_CACHE["index"]
+        try:
+            data = json.loads(PORT_INDEX.read_text(encoding="utf-8"))
+            if data.get("sig") == sig:
+                _PORT_INDEX_CACHE.update(sig=sig, index=data["index"])
+                return data["index"]
+        except Exception:
+            pass
+
+    index: Dict[str, str] = {}
+    by_dir: Dict[str, str] = {}
+    if PORTFILES_ROOT.exists():
+        paths = [Path(e.path) for e in _iter_portfiles(PORTFILES_ROOT)]
+        # reads are independent and latency-bound: overlap them
+        with ThreadPoolExecutor(max_workers=max(1, min(32, len(paths)))) as ex:
+            names = list(ex.map(_read_portfile_name, paths))
+        for pf, name in zip(paths, names):
+            if name:
+                index.setdefault(name, str(pf))
+            by_dir.setdefault(pf.parent.name, str(pf))
+    for dirname, path in by_dir.items():
+        index.setdefault(dirname, path)
+
+    try:
+        PORT_INDEX.write_text(json.dumps({"sig": sig, "index": index}), encoding="utf-8")
+    except Exception:
+        pass
+    _PORT_INDEX_CACHE.update(sig=sig, index=index)
+    return index
 
 
 def find_portfile_for(name: str) -> Optional[Path]:
     """
     Localiza o portfile.yaml para um pacote (procura por name no /usr/ports/**/portfile.yaml).
+    Usa o índice persistido; uma entrada obsoleta força a reconstrução do índice.
+    """
+    path = _load_or_build_port_index().get(name)
+    if path and not Path(path).exists():
+        path = _load_or_build_port_index(rebuild=True).get(name)
+    return Path(path) if path else None
+
+
+def _portfiles_signature() -> tuple:
+    """
+    Assinatura (caminho, mtime_ns) de todos os portfiles; muda quando algum portfile é
+    adicionado, removido ou editado.
     """
+    sig = []
     if PORTFILES_ROOT.exists():
-        for pf in PORTFILES_ROOT.glob("**/portfile.yaml"):
+        for entry in _iter_portfiles(PORTFILES_ROOT):
             try:
-                if yaml:
-                    with open(pf, encoding="utf-8") as f:
-                        meta = yaml.safe_load(f)
-                else:
-                    # fallback: crude check by reading file content
-                    txt = pf.read_text(encoding="utf-8")
-                    meta = {}
-                    for line in txt.splitlines():
-                        if line.strip().startswith("name:"):
-                            meta["name"] = line.split(":", 1)[1].strip()
-                            break
-                if not meta:
-                    continue
-                if meta.get("name") == name or pf.parent.name == name:
-                    return pf
-            except Exception:
+                sig.append((entry.path, entry.stat().st_mtime_ns))
+            except OSError:
                 continue
-    return None
+    return tuple(sorted(sig))
 
 
 def build_dependency_graph() -> "dependency.DependencyGraph":
     """
     Constrói o grafo de dependências a partir dos portfiles.
     Usa dependency.build_graph_from_portfiles se disponível, senão tenta implementação mínima.
+    O grafo fica em cache até que a assinatura dos portfiles mude.
     """
+    sig = _portfiles_signature()
+    if _GRAPH_CACHE["graph"] is not None and _GRAPH_CACHE["mtime_sig"] == sig:
+        return _GRAPH_CACHE["graph"]
+    graph = _build_dependency_graph_uncached()
+    _GRAPH_CACHE.update(mtime_sig=sig, graph=graph, orders={})
+    return graph
+
+
+def _build_dependency_graph_uncached() -> "dependency.DependencyGraph":
     if dependency and hasattr(dependency, "build_graph_from_portfiles"):
         return dependency.build_graph_from_portfiles(Path(PORTFILES_ROOT))
     # fallback minimal graph
@@ -126,25 +364,46 @@ def build_dependency_graph() -> "dependency.DependencyGraph":
         def add_dependency(self, pkg, dep, constraint=None, optional=False):
             self._dg.setdefault(pkg, []).append(dep)
         def install_order(self, targets=None, include_optional=True):
-            # very naive: return targets only
-            if targets is None:
-                return list(self._dg.keys())
-            return list(targets)
+            # depth-first post-order: deps before dependents, each package once
+            seen: Set[str] = set()
+            order: List[str] = []
+            def visit(p):
+                if p in seen:
+                    return
+                seen.add(p)
+                for d in self._dg.get(p, []):
+                    visit(d)
+                order.append(p)
+            for t in (self._dg.keys() if targets is None else targets):
+                visit(t)
+            return order
     return _G()  # type: ignore
 
 
-def resolve_install_order(target: str) -> List[str]:
+def resolve_install_order(target: str, dg: Any = None) -> List[str]:
     """
     Usa dependency graph para obter ordem de instalação (dependências primeiro).
     Retorna lista ordenada com todos os pacotes que precisam ser construídos (inclui target).
+    dg: grafo já obtido pelo chamador (evita percorrer os portfiles de novo).
     """
-    dg = build_dependency_graph()
+    if dg is None:
+        dg = build_dependency_graph()
+    cached = _GRAPH_CACHE["orders"].get(target)
+    if cached is not None:
+        return list(cached)
     try:
         # dependency.DependencyGraph.install_order accepts targets list
-        order = dg.install_order(targets=[target])
-        # install_order returns deps before dependents; ensure target is last
-        if target not in order:
+        raw = dg.install_order(targets=[target])
+        # install_order returns deps before dependents; drop repeats, ensure target is last
+        seen: Set[str] = set()
+        order = []
+        for pkg in raw:
+            if pkg not in seen:
+                seen.add(pkg)
+                order.append(pkg)
+        if target not in seen:
             order.append(target)
+        _GRAPH_CACHE["orders"][target] = list(order)
         return order
     except Exception as e:
         # try to fall back to topological on whole graph or at least target-only build
@@ -152,24 +411,73 @@ def resolve_install_order(target: str) -> List[str]:
         return [target]
 
 
-def is_installed(name: str, version: Optional[str] = None) -> bool:
-    db = load_installed_db()
-    if name not in db:
+def _direct_deps(dg: Any, pkg: str) -> Optional[List[str]]:
+    """
+    Dependências diretas de pkg no grafo (None se o grafo não as expõe).
+    """
+    adj = getattr(dg, "adj", None)
+    if isinstance(adj, dict):
+        return [d[0] if isinstance(d, (tuple, list)) else d for d in adj.get(pkg, [])]
+    raw = getattr(dg, "_dg", None)
+    if isinstance(raw, dict):
+        return list(raw.get(pkg, []))
+    return None
+
+
+def resolve_build_plan(target: str) -> Tuple[List[str], Dict[str, Set[str]]]:
+    """
+    Retorna (ordem de instalação, deps) onde deps[pkg] é o conjunto de pré-requisitos
+    de pkg dentro da ordem. Sem arestas no grafo, cada pacote depende do anterior
+    (mesma semântica do build sequencial).
+    """
+    # uma só varredura dos portfiles por build: o mesmo grafo serve à ordem e às arestas
+    dg = build_dependency_graph()
+    order = resolve_install_order(target, dg)
+    in_order = set(order)
+    deps: Dict[str, Set[str]] = {}
+    prev: Optional[str] = None
+    for pkg in order:
+        direct = _direct_deps(dg, pkg)
+        if direct is None:
+            deps[pkg] = {prev} if prev else set()
+        else:
+            deps[pkg] = {d for d in direct if d in in_order and d != pkg}
+        prev = pkg
+    return order, deps
+
+
+def is_installed(name: str, version: Optional[str] = None, db: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Verifica se name (opcionalmente em version) está instalado.
+    Aceita um DB já carregado para evitar reler o arquivo a cada consulta.
+    """
+    entry = lookup_installed(name) if db is None else db.get(name)
+    if entry is None:
         return False
     if version:
-        return db[name].get("version") == version
+        return entry.get("version") == version
     return True
 
 
+def lookup_installed(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna a entrada de name no DB (consulta por chave, sem materializar o DB inteiro).
+    """
+    try:
+        return _installed_db().get(name)
+    except Exception:
+        return None
+
+
 def register_installed(name: str, version: str, metadata_path: str, package_files: List[str]) -> None:
-    db = load_installed_db()
-    db[name] = {
+    entry = {
         "version": version,
         "metadata": metadata_path,
         "package_files": package_files,
         "installed_at": _now_ts()
     }
-    save_installed_db(db)
+    # uma linha via INSERT OR REPLACE; o SQLite (WAL) serializa escritores concorrentes
+    _installed_db().put(name, entry)
 
 
 def build_one(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
@@ -213,7 +521,7 @@ def build_one(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
             return {"status": "error", "message": f"sandbox.build_port failed: {e}"}
     except Exception as e:
         _log(log_prefix, f"sandbox.build_port failed: {e}")
-        _log(log_prefix, traceback.format_exc())
+        _log_traceback(log_prefix, options)
         return {"status": "error", "message": f"sandbox.build_port failed: {e}"}
 
     if res.get("status") != "ok":
@@ -232,7 +540,7 @@ def build_one(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
         pkgs = packager.package_from_metadata(meta_path)
     except Exception as e:
         _log(log_prefix, f"packager failed: {e}")
-        _log(log_prefix, traceback.format_exc())
+        _log_traceback(log_prefix, options)
         return {"status": "error", "message": f"packager failed: {e}"}
 
     package_paths: List[str] = []
@@ -240,11 +548,16 @@ def build_one(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
         if v:
             package_paths.append(str(v))
 
-    # register installed info (metadata may include name, version)
-    try:
-        md = json.loads(meta_path.read_text(encoding="utf-8"))
-    except Exception:
-        md = {}
+    # register installed info: sandbox.build_port already reports name/version;
+    # only re-read the metadata file when it did not
+    md = res.get("meta")
+    if not isinstance(md, dict):
+        md = {k: res[k] for k in ("name", "version") if res.get(k)}
+    if "version" not in md:
+        try:
+            md = {**_json_loads(meta_path.read_bytes()), **md}
+        except Exception:
+            pass
     pkg_name = md.get("name", name)
     pkg_ver = md.get("version", md.get("pkgver", "0.0.0"))
 
@@ -259,6 +572,7 @@ def build(target: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, An
     Fluxo de build para target:
      - Resolve ordem de instalação
      - Para cada pacote na ordem: se não instalado (ou force) -> build_one
+     - Pacotes sem dependências pendentes entre si são construídos em paralelo (options["jobs"])
     """
     options = options or {}
     force = options.get("force", False)
@@ -268,38 +582,78 @@ def build(target: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, An
 
     _log("core", f"build start target={target} force={force} keep_build={keep_build} dry_run={dry_run}")
 
-    # Resolve install order (deps first)
+    # fail fast once instead of once per package in the order
+    missing = [m for m, mod in (("sandbox", sandbox), ("packager", packager)) if mod is None]
+    if missing:
+        msg = f"{', '.join(missing)} module not available"
+        _log("core", msg)
+        flush_logs()
+        return {"status": "error", "built": [], "failed": {target: msg}}
+
+    jobs = max(1, int(options.get("jobs") or 1))
+
+    # Resolve install order (deps first) and per-package prerequisites
     try:
-        order = resolve_install_order(target)
+        order, deps = resolve_build_plan(target)
     except Exception as e:
         _log("core", f"failed to resolve order: {e}")
-        order = [target]
+        order, deps = [target], {target: set()}
 
     built: List[str] = []
     failed: Dict[str, str] = {}
 
-    for pkg in order:
-        if not force and is_installed(pkg):
-            _log("core", f"skipping {pkg} (already installed)")
-            continue
-        _log("core", f"building {pkg} ...")
-        try:
-            res = build_one(pkg, options)
-            if res.get("status") == "ok":
-                built.append(pkg)
-            else:
-                failed[pkg] = res.get("message") or "unknown"
-                _log("core", f"build failed for {pkg}: {res}")
-                # stop chain on failure (safe default)
-                break
-        except Exception as e:
-            failed[pkg] = str(e)
-            _log("core", f"exception building {pkg}: {e}")
-            _log("core", traceback.format_exc())
-            break
+    # reverse edges: prereq -> packages waiting on it
+    waiting: Dict[str, Set[str]] = {p: set() for p in order}
+    for pkg, prereqs in deps.items():
+        for d in prereqs:
+            waiting.setdefault(d, set()).add(pkg)
+    # snapshot of the installed DB, read once for the whole run
+    installed = load_installed_db()
+    pending = {p: set(d) for p, d in deps.items()}
+    ready = deque(p for p in order if not pending[p])
+    running: Dict[Any, str] = {}
+
+    def _done(pkg: str) -> None:
+        for dependent in waiting.get(pkg, ()):
+            rest = pending[dependent]
+            rest.discard(pkg)
+            if not rest:
+                ready.append(dependent)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # stop chain on failure (safe default): nothing new is started, but builds
+        # already in flight are drained so their results/registration are reported
+        while running or (ready and not failed):
+            while ready and not failed and len(running) < jobs:
+                pkg = ready.popleft()
+                if not force and is_installed(pkg, db=installed):
+                    _log("core", f"skipping {pkg} (already installed)")
+                    _done(pkg)
+                    continue
+                _log("core", f"building {pkg} ...")
+                running[executor.submit(build_one, pkg, options)] = pkg
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                pkg = running.pop(fut)
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    failed[pkg] = str(e)
+                    _log("core", f"exception building {pkg}: {e}")
+                    _log_traceback("core", options)
+                    continue
+                if res.get("status") == "ok":
+                    built.append(pkg)
+                    _done(pkg)
+                else:
+                    failed[pkg] = res.get("message") or "unknown"
+                    _log("core", f"build failed for {pkg}: {res}")
 
     result = {"status": "ok" if not failed else "error", "built": built, "failed": failed}
     _log("core", f"build result: {result}")
+    flush_logs()
     return result
 
 
@@ -312,6 +666,7 @@ def cli_main(argv: Optional[List[str]] = None) -> int:
     parser.add_argument("--toolchain-dir", type=str, help="toolchain directory to make available in sandbox")
     parser.add_argument("--chroot", action="store_true", help="prepare chroot (bind mounts) for build")
     parser.add_argument("--debug", action="store_true", help="verbose debug")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of packages to build in parallel")
     args = parser.parse_args(argv)
 
     options = {
@@ -321,6 +676,7 @@ def cli_main(argv: Optional[List[str]] = None) -> int:
         "toolchain_dir": args.toolchain_dir,
         "chroot": args.chroot,
         "debug": args.debug,
+        "jobs": args.jobs,
     }
 
     try:
@@ -333,7 +689,7 @@ def cli_main(argv: Optional[List[str]] = None) -> int:
     except Exception as e:
         print("unexpected error:", e)
         _log("core", f"unexpected error: {e}")
-        _log("core", traceback.format_exc())
+        _log_traceback("core", options)
         return 1
 
 
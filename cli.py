@@ -10,25 +10,40 @@ Chamadas suportadas:
 Com abreviaturas, cores, integração de todos os módulos
 """
 
-import os
 import sys
 import argparse
 from pathlib import Path
 import json
+from functools import lru_cache
 
-from pyport.logger import get_logger
-from pyport.config import get_config
-from pyport.core import Core
-from pyport.dependency import DependencyGraph
-from pyport.update import check_updates
-from pyport.search import search_ports
-from pyport.info import info_ports
-from pyport.install import install_package
-from pyport.fakeroot import Fakerunner
-from pyport.toolchain import ToolchainManager
-from pyport.sandbox import ChrootManager
+# Os módulos do pyport (logger, config, core, toolchain, sandbox, fakeroot, ...)
+# são importados apenas quando usados.
 
-LOG = get_logger("pyport.cli")
+
+@lru_cache(maxsize=None)
+def _log():
+    from pyport.logger import get_logger
+    return get_logger("pyport.cli")
+
+
+def _config():
+    from pyport.config import get_config
+    return get_config()
+
+# Abreviações
+CMD_ALIASES = {
+    "b": "build",
+    "rm": "remove",
+    "r": "remove",
+    "i": "install",
+    "s": "sync",
+    "ls": "list",
+    "u": "update",
+    "upd": "update",
+    "se": "search",
+    "tc": "toolchain",
+    "ch": "chroot"
+}
 
 def _print_colored(text: str, color_code: str, enabled=True):
     if enabled:
@@ -36,71 +51,52 @@ def _print_colored(text: str, color_code: str, enabled=True):
     else:
         print(text)
 
-def main():
-    cfg = get_config()
-    core = Core()
-    toolchain = ToolchainManager(cfg)
-    chroot = ChrootManager(cfg)
-
-    parser = argparse.ArgumentParser(prog="pyport",
-                                     description="PyPort - Gerenciador de ports source para Linux",
-                                     formatter_class=argparse.RawTextHelpFormatter)
-
-    # Abreviações
-    cmd_aliases = {
-        "b": "build",
-        "rm": "remove",
-        "r": "remove",
-        "i": "install",
-        "s": "sync",
-        "ls": "list",
-        "u": "update",
-        "upd": "update",
-        "se": "search",
-        "tc": "toolchain",
-        "ch": "chroot"
-    }
-
-    sub = parser.add_subparsers(dest="cmd", required=True, help="comando a executar")
-
-    # build
+def _add_build(sub):
     p_build = sub.add_parser("build", help="Construir um port")
     p_build.add_argument("portname", help="Nome do port a construir")
     p_build.add_argument("--force", "-f", action="store_true", help="Forçar rebuild")
     p_build.add_argument("--dry-run", "-d", action="store_true", help="Simular sem executar")
 
-    # remove
+
+def _add_remove(sub):
     p_remove = sub.add_parser("remove", help="Remover um port instalado")
     p_remove.add_argument("portname", help="Nome do port a remover")
     p_remove.add_argument("--force", "-f", action="store_true", help="Ignorar dependências reversas")
     p_remove.add_argument("--dry-run", "-d", action="store_true", help="Simular sem executar")
     p_remove.add_argument("--yes", "-y", action="store_true", help="Confirmar automaticamente")
 
-    # sync
+
+def _add_sync(sub):
     sub.add_parser("sync", help="Sincronizar árvore de ports")
 
-    # info
+
+def _add_info(sub):
     p_info = sub.add_parser("info", help="Mostrar informação de um port")
     p_info.add_argument("portname", help="Nome do port")
 
-    # list
+
+def _add_list(sub):
     sub.add_parser("list", help="Listar todos os ports disponíveis")
 
-    # install
+
+def _add_install(sub):
     p_install = sub.add_parser("install", help="Instalar pacote gerado")
     p_install.add_argument("package_file", help="Arquivo de pacote ou nome")
     p_install.add_argument("--force", "-f", action="store_true")
     p_install.add_argument("--dry-run", "-d", action="store_true")
 
-    # search
+
+def _add_search(sub):
     p_search = sub.add_parser("search", help="Procurar ports")
     p_search.add_argument("term", help="Termo de busca")
     p_search.add_argument("--limit", "-l", type=int, default=20)
 
-    # update
+
+def _add_update(sub):
     sub.add_parser("update", help="Verificar atualizações disponíveis")
 
-    # toolchain
+
+def _add_toolchain(sub):
     p_tc = sub.add_parser("toolchain", help="Gerenciar toolchain em /mnt/tools")
     tc_sub = p_tc.add_subparsers(dest="tc_cmd", required=True)
 
@@ -110,107 +106,200 @@ def main():
     tc_sub.add_parser("remove", help="Remover toolchain")
     tc_sub.add_parser("list", help="Listar toolchains disponíveis")
 
-    # chroot
+
+def _add_chroot(sub):
     p_ch = sub.add_parser("chroot", help="Gerenciar ambiente chroot")
     ch_sub = p_ch.add_subparsers(dest="ch_cmd", required=True)
 
     ch_sub.add_parser("enter", help="Entrar no chroot")
     ch_sub.add_parser("clean", help="Desmontar e limpar chroot")
 
+
+_SUBCOMMANDS = {
+    "build": _add_build,
+    "remove": _add_remove,
+    "sync": _add_sync,
+    "info": _add_info,
+    "list": _add_list,
+    "install": _add_install,
+    "search": _add_search,
+    "update": _add_update,
+    "toolchain": _add_toolchain,
+    "chroot": _add_chroot,
+}
+
+# parsers já construídos, por comando (None = árvore completa)
+_PARSERS = {}
+
+
+def _build_parser(only=None):
+    """
+    Constrói o ArgumentParser. Com `only`, registra apenas aquele subcomando.
+    """
+    if only in _PARSERS:
+        return _PARSERS[only]
+
+    parser = argparse.ArgumentParser(prog="pyport",
+                                     description="PyPort - Gerenciador de ports source para Linux",
+                                     formatter_class=argparse.RawTextHelpFormatter)
+
+    sub = parser.add_subparsers(dest="cmd", required=True, help="comando a executar")
+    if only:
+        _SUBCOMMANDS[only](sub)
+    else:
+        for add in _SUBCOMMANDS.values():
+            add(sub)
+
     # opções globais
     parser.add_argument("--color", action="store_true", help="Forçar saída colorida")
     parser.add_argument("--no-color", action="store_true", help="Desativar cores")
     parser.add_argument("--verbose", "-v", action="count", default=0, help="Mais verbosidade")
 
-    args = parser.parse_args()
+    _PARSERS[only] = parser
+    return parser
+
+
+def _split_command(argv):
+    """
+    Localiza o primeiro token que não é opção; resolve abreviação.
+    Retorna (argv com o comando canônico, comando ou None).
+    """
+    for i, tok in enumerate(argv):
+        if tok.startswith("-"):
+            continue
+        cmd = CMD_ALIASES.get(tok, tok)
+        if cmd in _SUBCOMMANDS:
+            return argv[:i] + [cmd] + argv[i + 1:], cmd
+        break
+    return argv, None
+
+
+def _core():
+    from pyport.core import Core
+    return Core()
+
+
+def _do_build(args):
+    res = _core().build(args.portname, force=args.force, dry_run=args.dry_run)
+    return 0 if res else 1
+
 
-    # Resolver abreviações
-    cmd = cmd_aliases.get(args.cmd, args.cmd)
+def _do_remove(args):
+    res = _core().remove(args.portname, force=args.force, dry_run=args.dry_run, yes=args.yes)
+    return 0 if res else 1
+
+
+def _do_sync(args):
+    return 0 if _core().sync() else 1
+
+
+def _do_info(args):
+    _core().info(args.portname)
+    return 0
+
+
+def _do_list(args):
+    _core().list_ports()
+    return 0
+
+
+def _do_install(args):
+    pkg = Path(args.package_file)
+    if not pkg.exists():
+        pkgdir = Path(_config()["paths"]["packages"])
+        candidate = pkgdir / args.package_file
+        if candidate.exists():
+            pkg = candidate
+        else:
+            _log().error(f"Pacote {args.package_file} não encontrado")
+            return 1
+    from pyport.fakeroot import Fakerunner
+    from pyport.install import install_package
+    fr = Fakerunner(dry_run=args.dry_run, debug=(args.verbose>=2))
+    res = install_package(pkg, sandbox=fr, force=args.force, dry_run=args.dry_run)
+    return 0 if res else 1
+
+
+def _do_search(args):
+    from pyport.search import search_ports
+    matches = search_ports(args.term, limit=args.limit)
+    for m in matches:
+        _print_colored(m, "33", enabled=not args.no_color)
+    return 0
+
+
+def _do_update(args):
+    from pyport.update import check_updates
+    upd = check_updates()
+    if not upd:
+        _log().info("Nenhuma atualização encontrada.")
+        return 0
+    for portname, current, latest in upd:
+        _print_colored(f"{portname}: {current} → {latest}", "32", enabled=not args.no_color)
+    repfile = _config().get("update", {}).get("report_file")
+    if repfile:
+        with open(repfile, "w", encoding="utf-8") as f:
+            f.write(json.dumps(upd, indent=2, ensure_ascii=False))
+        _log().info(f"Relatório salvo em {repfile}")
+    return 0
+
+
+def _do_toolchain(args):
+    from pyport.toolchain import ToolchainManager
+    toolchain = ToolchainManager(_config())
+    if args.tc_cmd == "create":
+        return 0 if toolchain.create(args.arch) else 1
+    if args.tc_cmd == "remove":
+        return 0 if toolchain.remove() else 1
+    toolchain.list()
+    return 0
+
+
+def _do_chroot(args):
+    from pyport.sandbox import ChrootManager
+    chroot = ChrootManager(_config())
+    if args.ch_cmd == "enter":
+        return 0 if chroot.enter() else 1
+    return 0 if chroot.clean() else 1
+
+
+HANDLERS = {
+    "build": _do_build,
+    "remove": _do_remove,
+    "sync": _do_sync,
+    "info": _do_info,
+    "list": _do_list,
+    "install": _do_install,
+    "search": _do_search,
+    "update": _do_update,
+    "toolchain": _do_toolchain,
+    "chroot": _do_chroot,
+}
+HANDLERS.update({alias: HANDLERS[cmd] for alias, cmd in CMD_ALIASES.items()})
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    argv, only = _split_command(argv)
+    parser = _build_parser(only)
+    args = parser.parse_args(argv)
+    cmd = args.cmd
 
     # Verbosidade
     if args.verbose >= 2:
-        LOG.setLevel("DEBUG")
+        _log().setLevel("DEBUG")
     elif args.verbose == 1:
-        LOG.setLevel("INFO")
+        _log().setLevel("INFO")
 
-    use_color = not args.no_color
+    handler = HANDLERS.get(cmd)
+    if handler is None:
+        parser.print_help()
+        sys.exit(1)
 
     try:
-        if cmd == "build":
-            res = core.build(args.portname, force=args.force, dry_run=args.dry_run)
-            sys.exit(0 if res else 1)
-
-        elif cmd == "remove":
-            res = core.remove(args.portname, force=args.force, dry_run=args.dry_run, yes=args.yes)
-            sys.exit(0 if res else 1)
-
-        elif cmd == "sync":
-            sys.exit(0 if core.sync() else 1)
-
-        elif cmd == "info":
-            core.info(args.portname)
-            sys.exit(0)
-
-        elif cmd == "list":
-            core.list_ports()
-            sys.exit(0)
-
-        elif cmd == "install":
-            pkg = Path(args.package_file)
-            if not pkg.exists():
-                pkgdir = Path(cfg["paths"]["packages"])
-                candidate = pkgdir / args.package_file
-                if candidate.exists():
-                    pkg = candidate
-                else:
-                    LOG.error(f"Pacote {args.package_file} não encontrado")
-                    sys.exit(1)
-            fr = Fakerunner(dry_run=args.dry_run, debug=(args.verbose>=2))
-            res = install_package(pkg, sandbox=fr, force=args.force, dry_run=args.dry_run)
-            sys.exit(0 if res else 1)
-
-        elif cmd == "search":
-            matches = search_ports(args.term, limit=args.limit)
-            for m in matches:
-                _print_colored(m, "33", enabled=use_color)
-            sys.exit(0)
-
-        elif cmd == "update":
-            upd = check_updates()
-            if not upd:
-                LOG.info("Nenhuma atualização encontrada.")
-                sys.exit(0)
-            for portname, current, latest in upd:
-                _print_colored(f"{portname}: {current} → {latest}", "32", enabled=use_color)
-            repfile = cfg.get("update", {}).get("report_file")
-            if repfile:
-                with open(repfile, "w", encoding="utf-8") as f:
-                    f.write(json.dumps(upd, indent=2, ensure_ascii=False))
-                LOG.info(f"Relatório salvo em {repfile}")
-            sys.exit(0)
-
-        elif cmd == "toolchain":
-            if args.tc_cmd == "create":
-                res = toolchain.create(args.arch)
-                sys.exit(0 if res else 1)
-            elif args.tc_cmd == "remove":
-                sys.exit(0 if toolchain.remove() else 1)
-            elif args.tc_cmd == "list":
-                toolchain.list()
-                sys.exit(0)
-
-        elif cmd == "chroot":
-            if args.ch_cmd == "enter":
-                sys.exit(0 if chroot.enter() else 1)
-            elif args.ch_cmd == "clean":
-                sys.exit(0 if chroot.clean() else 1)
-
-        else:
-            parser.print_help()
-            sys.exit(1)
-
+        sys.exit(handler(args))
     except Exception as e:
-        LOG.error(f"Erro no comando {cmd}: {e}")
+        _log().error(f"Erro no comando {cmd}: {e}")
         if args.verbose >= 2:
             import traceback
             traceback.print_exc()
@@ -16,12 +16,19 @@ Features:
 
 import subprocess
 import os
+import sys
 import hashlib
+import json
+import mmap
 import time
-import shutil
-import psutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    import xxhash  # faster non-cryptographic hash for change detection
+except ImportError:
+    xxhash = None
 
 from pyport.logger import get_logger
 from pyport.sandbox import Sandbox
@@ -34,42 +41,213 @@ class CompileError(Exception):
 
 # ---------------- Utils ----------------
 
+_HASH_ALGO = "xxh3" if xxhash else "sha256"
+
+
+def _new_hash():
+    return xxhash.xxh3_64() if xxhash else hashlib.sha256()
+
+
+_CACHE_NAMES = {".compile_done", ".compile_dirhashes.json", ".compile_contenthash"}
+
+
+def _dir_digest(path: str) -> Tuple[str, List[str]]:
+    """Digest of (name, mtime_ns, size) of the files directly in path; also returns its subdirs"""
+    h = _new_hash()
+    subdirs = []
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for e in entries:
+        if e.is_dir(follow_symlinks=False):
+            subdirs.append(e.path)
+        elif e.name not in _CACHE_NAMES:
+            st = e.stat(follow_symlinks=False)
+            h.update(e.name.encode())
+            h.update(st.st_mtime_ns.to_bytes(8, "little", signed=True))
+            h.update(st.st_size.to_bytes(8, "little"))
+    return h.hexdigest(), subdirs
+
+
 def _hash_source(build_dir: Path) -> str:
-    """Hash source files for caching (based on mtime + name)"""
-    h = hashlib.sha256()
-    for f in build_dir.rglob("*"):
-        if f.is_file():
-            h.update(f.name.encode())
-            h.update(str(f.stat().st_mtime).encode())
+    """Hash source files for caching (based on name + mtime + size).
+
+    Every file is stat'ed on each call, so a file edited in place is noticed even
+    when its directory's mtime did not move; directories are scanned level by
+    level in a thread pool (stat/scandir release the GIL).
+    """
+    def _visit(d: str):
+        try:
+            digest, subdirs = _dir_digest(d)
+        except OSError:
+            return d, None, []
+        return d, digest, subdirs
+
+    digests: Dict[str, str] = {}
+    level = [str(build_dir)]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+        while level:
+            nxt: List[str] = []
+            for d, digest, subdirs in ex.map(_visit, level):
+                if digest is not None:
+                    digests[d] = digest
+                nxt.extend(subdirs)
+            level = nxt
+
+    h = _new_hash()
+    for d in sorted(digests):
+        h.update(d.encode())
+        h.update(digests[d].encode())
+    # algorithm prefix: a cache written with another algorithm never matches
+    return f"{_HASH_ALGO}:{h.hexdigest()}"
+
+
+def _file_digest(path: str) -> str:
+    h = _new_hash()
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+        except ValueError:  # empty file
+            pass
     return h.hexdigest()
 
-def _stream_logs(proc: subprocess.Popen, portname: str):
-    """Stream logs in real-time with colors"""
-    import sys
-    import threading
+def _content_hash(build_dir: Path) -> str:
+    """Hash of file contents (not mtimes); per-file digests are reused from
+    .compile_contenthash (JSON: rel -> [mtime_ns, size, digest]) for files
+    whose (mtime_ns, size) did not change"""
+    side = build_dir / ".compile_contenthash"
+    try:
+        prev = json.loads(side.read_bytes())
+        if not isinstance(prev, dict) or prev.get("algo") != _HASH_ALGO:
+            prev = {}
+    except (OSError, ValueError):
+        prev = {}
+    old_files = prev.get("files")
+    if not isinstance(old_files, dict):
+        old_files = {}
+    files: Dict[str, List[Any]] = {}
+
+    root = str(build_dir)
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                stack.append(e.path)
+                continue
+            if e.name in _CACHE_NAMES:
+                continue
+            rel = os.path.relpath(e.path, root)
+            try:
+                st = e.stat(follow_symlinks=False)
+                old = old_files.get(rel)
+                if (isinstance(old, list) and len(old) == 3 and isinstance(old[2], str)
+                        and old[0] == st.st_mtime_ns and old[1] == st.st_size):
+                    digest = old[2]
+                elif e.is_symlink():
+                    digest = "link:" + os.readlink(e.path)
+                else:
+                    digest = _file_digest(e.path)
+            except OSError:
+                continue
+            files[rel] = [st.st_mtime_ns, st.st_size, digest]
+
+    h = _new_hash()
+    for rel in sorted(files):
+        h.update(rel.encode())
+        h.update(files[rel][2].encode())
+    try:
+        side.write_text(json.dumps({"algo": _HASH_ALGO, "files": files}))
+    except OSError:
+        pass
+    return f"{_HASH_ALGO}:{h.hexdigest()}"
 
-    def reader(stream, prefix, color):
-        for line in iter(stream.readline, b""):
-            sys.stdout.write(f"\033[{color}m[{portname}] {prefix}: {line.decode().rstrip()}\033[0m\n")
+def _read_compile_cache(cache_file: Path) -> Optional[Dict[str, Any]]:
+    """Load .compile_done: {"hash", "content", "time", "elapsed"}.
+
+    build_dir comes from an untrusted source archive, so the file is plain JSON;
+    anything that does not decode to a dict counts as no cache.
+    """
+    try:
+        entry = json.loads(cache_file.read_bytes())
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+def _write_compile_cache(cache_file: Path, entry: Dict[str, Any]):
+    cache_file.write_text(json.dumps(entry))
+
+def _stdout_writer():
+    """Byte writer for sys.stdout: its binary buffer (BufferedWriter.write writes the
+    whole chunk, retrying short writes), or text writes when stdout has no buffer
+    (StringIO, some wrappers)"""
+    buf = getattr(sys.stdout, "buffer", None)
+    if buf is not None:
+        def write(data: bytes):
+            buf.write(data)
+            buf.flush()
+    else:
+        def write(data: bytes):
+            sys.stdout.write(data.decode(errors="replace"))
             sys.stdout.flush()
-        stream.close()
+    return write
 
-    threads = []
-    threads.append(threading.Thread(target=reader, args=(proc.stdout, "OUT", "32")))
-    threads.append(threading.Thread(target=reader, args=(proc.stderr, "ERR", "31")))
-    for t in threads: t.start()
-    for t in threads: t.join()
+def _stream_logs(proc: subprocess.Popen, portname: str):
+    """Stream logs in real-time with colors (one selector loop over stdout/stderr)"""
+    import selectors
+
+    sys.stdout.flush()
+    write = _stdout_writer()
+    suffix = b"\033[0m\n"
+
+    sel = selectors.DefaultSelector()
+    for stream, prefix, color in ((proc.stdout, "OUT", "32"), (proc.stderr, "ERR", "31")):
+        head = f"\033[{color}m[{portname}] {prefix}: ".encode()
+        sel.register(stream.fileno(), selectors.EVENT_READ, [stream, head, b""])
+
+    while sel.get_map():
+        for key, _ in sel.select():
+            state = key.data
+            stream, head, pending = state
+            chunk = os.read(key.fd, 65536)
+            if not chunk:
+                if pending:
+                    write(head + pending.rstrip(b"\r") + suffix)
+                sel.unregister(key.fd)
+                stream.close()
+                continue
+            lines = (pending + chunk).split(b"\n")
+            state[2] = lines.pop()
+            if lines:
+                write(b"".join(head + l.rstrip(b"\r") + suffix for l in lines))
+    sel.close()
+
+def _maybe_env(overrides: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """Environment for child processes: None (inherit) unless there are overrides"""
+    if not overrides:
+        return None
+    env = os.environ.copy()
+    env.update({str(k): str(v) for k, v in overrides.items()})
+    return env
 
-def _run_command(cmd: List[str], cwd: Path, sandbox: Optional[Sandbox], jobs: int, env: Dict[str, str], retries: int = 1):
+def _run_command(cmd: List[str], cwd: Path, sandbox: Optional[Sandbox], jobs: int, env: Optional[Dict[str, str]], retries: int = 1):
     """Run a build command with retries and sandbox support"""
-    if jobs > 1 and any("make" in c for c in cmd):
-        cmd.append(f"-j{jobs}")
     log.info(f"Executando: {' '.join(cmd)} em {cwd}")
 
     for attempt in range(1, retries + 1):
         try:
             if sandbox:
-                sandbox.run(" ".join(cmd), cwd=cwd, env=env)
+                # argv list: exec'd directly, no join/re-split of arguments
+                sandbox.run(list(cmd), cwd=cwd, env=env)
+            elif sys.stdout.isatty():
+                # interactive: the child writes straight to the terminal, no Python I/O in between
+                proc = subprocess.Popen(cmd, cwd=cwd, env=env)
+                proc.wait()
             else:
                 proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
                 _stream_logs(proc, cwd.name)
@@ -84,30 +262,50 @@ def _run_command(cmd: List[str], cwd: Path, sandbox: Optional[Sandbox], jobs: in
 
 # ---------------- Auto-detect Build System ----------------
 
+# build_dir -> (mtime_ns, system); a changed top-level listing bumps the mtime
+_DETECT_CACHE: Dict[str, Tuple[int, str]] = {}
+
 def detect_build_system(build_dir: Path) -> str:
-    """Detect build system from files"""
-    if (build_dir / "configure").exists():
-        return "autotools"
-    if (build_dir / "CMakeLists.txt").exists():
-        return "cmake"
-    if (build_dir / "meson.build").exists():
-        return "meson"
-    if (build_dir / "Cargo.toml").exists():
-        return "cargo"
-    if (build_dir / "setup.py").exists():
-        return "python"
-    if any(build_dir.glob("*.java")) or (build_dir / "pom.xml").exists():
-        return "java"
-    return "custom"
+    """Detect build system from files (one directory read, memoized by mtime)"""
+    key = str(build_dir)
+    try:
+        mtime = os.stat(key).st_mtime_ns
+        cached = _DETECT_CACHE.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with os.scandir(key) as it:
+            names = {e.name for e in it}
+    except OSError:
+        return "custom"
+
+    if "configure" in names:
+        system = "autotools"
+    elif "CMakeLists.txt" in names:
+        system = "cmake"
+    elif "meson.build" in names:
+        system = "meson"
+    elif "Cargo.toml" in names:
+        system = "cargo"
+    elif "setup.py" in names:
+        system = "python"
+    elif "pom.xml" in names or any(n.endswith(".java") for n in names):
+        system = "java"
+    else:
+        system = "custom"
+    _DETECT_CACHE[key] = (mtime, system)
+    return system
 
 # ---------------- Build Runners ----------------
 
-def _run_make(build_dir, sandbox, jobs, env): _run_command(["make"], build_dir, sandbox, jobs, env, retries=2)
+def _run_make(build_dir, sandbox, jobs, env):
+    cmd = ["make", f"-j{jobs}"] if jobs > 1 else ["make"]
+    _run_command(cmd, build_dir, sandbox, jobs, env, retries=2)
 def _run_ninja(build_dir, sandbox, jobs, env): _run_command(["ninja"], build_dir, sandbox, jobs, env, retries=2)
 def _run_cargo(build_dir, sandbox, jobs, env): _run_command(["cargo", "build", "--release"], build_dir, sandbox, jobs, env)
 def _run_python(build_dir, sandbox, jobs, env): _run_command(["python3", "setup.py", "build"], build_dir, sandbox, jobs, env)
 def _run_java(build_dir, sandbox, jobs, env):
-    java_files = [str(f) for f in build_dir.glob("*.java")]
+    with os.scandir(build_dir) as it:
+        java_files = sorted(e.path for e in it if e.name.endswith(".java") and e.is_file())
     if not java_files:
         raise CompileError("Nenhum .java encontrado")
     _run_command(["javac"] + java_files, build_dir, sandbox, jobs, env)
@@ -124,22 +322,34 @@ def compile_port(
     """Compile port with sandbox, hooks, caching and retries"""
     portname = port.get("name", build_dir.name)
     system = port.get("build_system", "").lower()
-    env = os.environ.copy()
+    # None = children inherit os.environ as-is (no per-call dict build)
+    env = _maybe_env(port.get("env"))
     jobs = jobs or os.cpu_count() or 1
 
-    if not system:
-        system = detect_build_system(build_dir)
-        log.info(f"[{portname}] Build system detectado: {system}")
-
     cache_file = build_dir / ".compile_done"
-    src_hash = _hash_source(build_dir)
+    entry = _read_compile_cache(cache_file)
+
+    if force and entry and isinstance(entry.get("elapsed"), (int, float)):
+        log.info(f"[{portname}] Rebuild forçado (último build: {entry['elapsed']:.1f}s)")
 
-    if cache_file.exists() and not force:
-        prev_hash = cache_file.read_text().strip()
-        if prev_hash == src_hash:
+    if entry and not force:
+        # fast path: stat only, no file contents read (see _hash_source)
+        src_hash = _hash_source(build_dir)
+        if entry.get("hash") == src_hash:
             log.info(f"[{portname}] Build já feito, pulando")
             return
 
+        # mtimes moved (git checkout, tar extract): compare actual contents before rebuilding
+        if entry.get("content") and _content_hash(build_dir) == entry["content"]:
+            log.info(f"[{portname}] Conteúdo inalterado (só mtimes mudaram), pulando")
+            entry["hash"] = src_hash
+            _write_compile_cache(cache_file, entry)
+            return
+
+    if not system:
+        system = detect_build_system(build_dir)
+        log.info(f"[{portname}] Build system detectado: {system}")
+
     run_hook(port, "pre_build", build_dir, sandbox)
 
     log.info(f"[{portname}] Iniciando compilação ({system}, -j{jobs})")
@@ -168,14 +378,21 @@ def compile_port(
             raise
 
     elapsed = time.time() - start_time
-    cache_file.write_text(src_hash)
 
     run_hook(port, "post_build", build_dir, sandbox)
 
+    # hashes of the tree as the build left it, so an untouched rerun matches
+    _write_compile_cache(cache_file, {
+        "hash": _hash_source(build_dir),
+        "content": _content_hash(build_dir),
+        "time": time.time(),
+        "elapsed": elapsed,
+    })
+
     # Stats
-    process = psutil.Process(os.getpid())
-    mem = process.memory_info().rss / (1024**2)
-    log.info(f"[{portname}] Build concluído em {elapsed:.1f}s | Memória usada: {mem:.1f} MB")
+    import resource
+    mem = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB -> MiB on Linux
+    log.info(f"[{portname}] Build concluído em {elapsed:.1f}s | Memória (pico): {mem:.1f} MB")
 
 # ---------------- CLI ----------------
 
@@ -189,8 +406,7 @@ def _cli():
     args = parser.parse_args()
 
     try:
-        with open(args.portfile, "r", encoding="utf-8") as f:
-            port = yaml.safe_load(f) or {}
+        port = yaml.load(Path(args.portfile).read_bytes(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
     except Exception as e:
         log.error(f"Erro carregando Portfile: {e}")
         sys.exit(1)
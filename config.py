@@ -16,12 +16,24 @@ Recursos:
 import os
 import sys
 import json
+import copy
+import hashlib
 import shutil
 import yaml
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from functools import lru_cache
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper  # libyaml (C)
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+try:
+    import orjson  # JSON em C para --json/--export
+except ImportError:
+    orjson = None
 
 from pyport.logger import get_logger
 
@@ -29,8 +41,7 @@ log = get_logger("pyport.config")
 
 SYSTEM_CONFIG = Path("/etc/pyport/config.yaml")
 USER_CONFIG = Path.home() / ".config/pyport/config.yaml"
-BACKUP_DIR = Path.home() / ".config/pyport/backups"
-BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+BACKUP_DIR = Path.home() / ".config/pyport/backups"  # criado no primeiro backup
 
 DEFAULTS: Dict[str, Any] = {
     "profile": "default",
@@ -62,47 +73,136 @@ DOCS: Dict[str, str] = {
 
 # -------------------- Helpers --------------------
 
-def load_yaml(path: Path) -> Dict[str, Any]:
-    if path.exists():
+# path -> ((mtime_ns, size), dados já parseados)
+_YAML_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# cache persistente entre execuções: um arquivo JSON por config, <blake2b(caminho)>.json
+# com {"path": ..., "key": [mtime_ns, size], "data": ...}
+YAML_CACHE_DIR = Path.home() / ".cache/pyport/yaml"
+
+def _disk_cache_file(path: Path) -> Path:
+    digest = hashlib.blake2b(str(path).encode(), digest_size=16).hexdigest()
+    return YAML_CACHE_DIR / f"{digest}.json"
+
+def _disk_cache_get(path: Path, key: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+    try:
+        entry = json.loads(_disk_cache_file(path).read_bytes())
+    except (OSError, ValueError):
+        return None  # ausente ou corrompido: parseia de novo
+    if (isinstance(entry, dict) and entry.get("path") == str(path)
+            and entry.get("key") == list(key) and isinstance(entry.get("data"), dict)):
+        return entry["data"]
+    return None
+
+def _disk_cache_put(path: Path, key: Tuple[int, int], data: Dict[str, Any]):
+    try:
+        raw = json.dumps({"path": str(path), "key": list(key), "data": data})
+        # chaves não-string/datas do YAML não sobrevivem ao JSON: sem cache para esse arquivo
+        if json.loads(raw)["data"] != data:
+            return
+    except (TypeError, ValueError):
+        return
+    cache = _disk_cache_file(path)
+    try:
+        YAML_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+        tmp.write_text(raw, encoding="utf-8")
+        os.replace(tmp, cache)
+    except OSError as e:
+        log.debug(f"Cache de YAML não gravado: {e}")
+
+def load_yaml(path: Path, key: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+    # key: (mtime_ns, size) já obtido pelo chamador, evita um segundo stat
+    if key is None:
+        key = _stat_key(path)
+    if key is None or key[1] == 0:
+        return {}
+    cached = _YAML_CACHE.get(path)
+    if cached and cached[0] == key:
+        return copy.deepcopy(cached[1])
+    data = _disk_cache_get(path, key)
+    if data is None:
         try:
             with open(path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f) or {}
+                data = yaml.load(f, Loader=_YamlLoader) or {}
+        except FileNotFoundError:
+            return {}
         except Exception as e:
             log.error(f"Erro lendo {path}: {e}")
-    return {}
+            return {}
+        _disk_cache_put(path, key, data)
+    _YAML_CACHE[path] = (key, data)
+    return copy.deepcopy(data)
+
+def _merge_inplace(dst: Dict[str, Any], src: Dict[str, Any]) -> Dict[str, Any]:
+    # merge em dst (que pertence ao chamador), sem alocar dicts intermediários
+    stack = [(dst, src)]
+    while stack:
+        d, s = stack.pop()
+        for k, v in s.items():
+            dv = d.get(k)
+            if isinstance(v, dict) and isinstance(dv, dict):
+                stack.append((dv, v))
+            else:
+                d[k] = v
+    return dst
 
 def merge_dicts(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
-    result = base.copy()
-    for k, v in override.items():
-        if isinstance(v, dict) and isinstance(result.get(k), dict):
-            result[k] = merge_dicts(result[k], v)
-        else:
-            result[k] = v
-    return result
+    # uma única cópia profunda; o merge é feito in-place, sem recursão
+    return _merge_inplace(copy.deepcopy(base), override)
 
 def backup_file(path: Path):
-    if not path.exists():
+    try:
+        st = path.stat()
+    except FileNotFoundError:
         return
     ts = time.strftime("%Y%m%d-%H%M%S")
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
     backup_path = BACKUP_DIR / f"{path.name}.{ts}.bak"
-    shutil.copy2(path, backup_path)
+    # copyfile usa sendfile no Linux; só o mtime é preservado (sem chmod/xattrs do copy2)
+    shutil.copyfile(path, backup_path)
+    os.utime(backup_path, ns=(st.st_atime_ns, st.st_mtime_ns))
     log.info(f"Backup criado: {backup_path}")
 
 def save_yaml(path: Path, data: Dict[str, Any]):
     path.parent.mkdir(parents=True, exist_ok=True)
     backup_file(path)
-    with open(path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+    # serializa em memória e grava com uma única chamada os.write
+    buf = yaml.dump(data, Dumper=_YamlDumper, sort_keys=False, allow_unicode=True).encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    key = _stat_key(path)
+    if key is not None:
+        _YAML_CACHE[path] = (key, copy.deepcopy(data))
     log.info(f"Config salva em {path}")
 
-def apply_env_overrides(cfg: Dict[str, Any]) -> Dict[str, Any]:
-    for key, value in os.environ.items():
-        if key.startswith("PYPORT_"):
-            parts = key.lower().split("_")[1:]
-            d = cfg
-            for p in parts[:-1]:
-                d = d.setdefault(p, {})
-            d[parts[-1]] = value
+def _env_overrides() -> Tuple[Tuple[str, str], ...]:
+    # uma única varredura de os.environ; só as variáveis PYPORT_*
+    return tuple(sorted((k, v) for k, v in os.environ.items() if k.startswith("PYPORT_")))
+
+def apply_env_overrides(cfg: Dict[str, Any],
+                        overrides: Optional[Tuple[Tuple[str, str], ...]] = None) -> Dict[str, Any]:
+    # overrides: pares PYPORT_* já coletados pelo chamador (ex.: chave do cache)
+    if overrides is None:
+        overrides = _env_overrides()
+    for key, value in overrides:
+        parts = key[7:].lower().split("_")
+        d = cfg
+        for p in parts[:-1]:
+            d = d.setdefault(p, {})
+        d[parts[-1]] = value
     return cfg
 
 def validate(cfg: Dict[str, Any]) -> Dict[str, Any]:
@@ -122,39 +222,102 @@ def validate(cfg: Dict[str, Any]) -> Dict[str, Any]:
 
 # -------------------- Config --------------------
 
-@lru_cache()
-def get_config() -> Dict[str, Any]:
-    cfg = DEFAULTS.copy()
+# (chave, config) — recarregado quando algum arquivo ou override PYPORT_* muda
+_cfg_cache: Optional[Tuple[Tuple[Any, ...], Dict[str, Any]]] = None
 
-    # system
-    sys_cfg = load_yaml(SYSTEM_CONFIG)
-    cfg = merge_dicts(cfg, sys_cfg)
+def _config_key() -> Tuple[Any, ...]:
+    key: list = []
+    for path in (SYSTEM_CONFIG, USER_CONFIG):
+        key.append(str(path))
+        key.append(_stat_key(path) or (0, 0))
+    key.append(_env_overrides())
+    return tuple(key)
 
-    # user
-    usr_cfg = load_yaml(USER_CONFIG)
-    cfg = merge_dicts(cfg, usr_cfg)
+def _invalidate_config():
+    global _cfg_cache
+    _cfg_cache = None
+
+def reload_config() -> Dict[str, Any]:
+    """Descarta a config memoizada do processo e recarrega."""
+    _invalidate_config()
+    return get_config()
+
+def get_config() -> Dict[str, Any]:
+    global _cfg_cache
+    key = _config_key()
+    if _cfg_cache is not None and _cfg_cache[0] == key:
+        return _cfg_cache[1]
+    cfg = _load_config(key[1], key[3], key[4])
+    _cfg_cache = (key, cfg)
+    return cfg
+
+def _load_layers(sys_key: Tuple[int, int], usr_key: Tuple[int, int]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # os dois arquivos são independentes; só vale abrir threads se ambos precisam ser lidos
+    need_sys = sys_key[1] and _YAML_CACHE.get(SYSTEM_CONFIG, (None,))[0] != sys_key
+    need_usr = usr_key[1] and _YAML_CACHE.get(USER_CONFIG, (None,))[0] != usr_key
+    if need_sys and need_usr:
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            f_sys = ex.submit(load_yaml, SYSTEM_CONFIG, sys_key)
+            f_usr = ex.submit(load_yaml, USER_CONFIG, usr_key)
+            return f_sys.result(), f_usr.result()
+    return load_yaml(SYSTEM_CONFIG, sys_key), load_yaml(USER_CONFIG, usr_key)
+
+def _load_config(sys_key: Tuple[int, int], usr_key: Tuple[int, int],
+                 overrides: Tuple[Tuple[str, str], ...]) -> Dict[str, Any]:
+    # cópia própria dos defaults; load_yaml já devolve cópias, então os merges são in-place
+    cfg = copy.deepcopy(DEFAULTS)
+
+    # system, depois user ((0, 0) = ausente/vazio: nada a abrir)
+    sys_cfg, usr_cfg = _load_layers(sys_key, usr_key)
+    _merge_inplace(cfg, sys_cfg)
+    _merge_inplace(cfg, usr_cfg)
 
     # env
-    cfg = apply_env_overrides(cfg)
+    cfg = apply_env_overrides(cfg, overrides)
 
     # validate
     cfg = validate(cfg)
 
     # expand ~
-    for k, v in cfg.get("paths", {}).items():
-        cfg["paths"][k] = str(Path(v).expanduser())
+    # só caminhos com ~ precisam de expansão; absolutos ficam como estão
+    paths = cfg.get("paths", {})
+    for k, v in paths.items():
+        if v.startswith("~"):
+            paths[k] = os.path.expanduser(v)
 
     return cfg
 
+def _norm_sandbox_mode(value: Any) -> Any:
+    if value not in ["fakeroot", "bwrap", "both", "none"]:
+        log.warning(f"Sandbox mode inválido '{value}', resetando para 'fakeroot'")
+        return "fakeroot"
+    return value
+
+def _norm_path(value: Any, key: str) -> Any:
+    if not isinstance(value, str):
+        log.warning(f"Path '{key}' inválido: {value} (resetando para default)")
+        return DEFAULTS["paths"].get(key, value)
+    return os.path.expanduser(value) if value.startswith("~") else value
+
+def _normalize_key(keys: list, value: Any) -> Any:
+    # mesma regra de validate()/_load_config, aplicada só à chave alterada
+    if keys == ["sandbox", "mode"]:
+        return _norm_sandbox_mode(value)
+    if len(keys) == 2 and keys[0] == "paths":
+        return _norm_path(value, keys[1])
+    return value
+
 def set_config(key: str, value: Any):
+    global _cfg_cache
     cfg = get_config()
     keys = key.split(".")
     d = cfg
     for k in keys[:-1]:
         d = d.setdefault(k, {})
-    d[keys[-1]] = value
+    d[keys[-1]] = _normalize_key(keys, value)
     save_yaml(USER_CONFIG, cfg)
-    get_config.cache_clear()
+    # cfg já é o resultado de recarregar o arquivo salvo: só a chave do cache muda
+    _cfg_cache = (_config_key(), cfg)
 
 def unset_config(key: str):
     cfg = get_config()
@@ -165,18 +328,47 @@ def unset_config(key: str):
     if keys[-1] in d:
         del d[keys[-1]]
     save_yaml(USER_CONFIG, cfg)
-    get_config.cache_clear()
+    _invalidate_config()
 
 def reset_config():
     backup_file(USER_CONFIG)
-    if USER_CONFIG.exists():
+    try:
         USER_CONFIG.unlink()
-    get_config.cache_clear()
+    except FileNotFoundError:
+        pass
+    _invalidate_config()
     log.info("Config resetada para defaults")
 
 # -------------------- CLI --------------------
 
+def _json_dumps(data: Dict[str, Any]) -> bytes:
+    # UTF-8 direto, indentado com 2 espaços (como json.dumps(..., ensure_ascii=False))
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _get_path(cfg: Dict[str, Any], dotted: str) -> Any:
+    val = cfg
+    for k in dotted.split("."):
+        val = val.get(k, {})
+    return val
+
+def _cli_fast(argv) -> bool:
+    # atalho para as leituras mais comuns (--get KEY, --json), sem montar o argparse
+    if len(argv) == 2 and argv[0] == "--get" and not argv[1].startswith("-"):
+        print(_get_path(get_config(), argv[1]))
+        return True
+    if len(argv) == 1 and argv[0].startswith("--get=") and len(argv[0]) > 6:
+        print(_get_path(get_config(), argv[0][6:]))
+        return True
+    if argv == ["--json"]:
+        sys.stdout.buffer.write(_json_dumps(get_config()) + b"\n")
+        return True
+    return False
+
 def _cli():
+    if _cli_fast(sys.argv[1:]):
+        return
     import argparse
     parser = argparse.ArgumentParser(description="PyPort Config")
     parser.add_argument("--json", action="store_true", help="Mostrar config em JSON")
@@ -191,13 +383,9 @@ def _cli():
     cfg = get_config()
 
     if args.json:
-        print(json.dumps(cfg, indent=2, ensure_ascii=False))
+        sys.stdout.buffer.write(_json_dumps(cfg) + b"\n")
     elif args.get:
-        keys = args.get.split(".")
-        val = cfg
-        for k in keys:
-            val = val.get(k, {})
-        print(val)
+        print(_get_path(cfg, args.get))
     elif args.set:
         set_config(args.set[0], args.set[1])
         print(f"{args.set[0]} atualizado para {args.set[1]}")
@@ -209,7 +397,7 @@ def _cli():
         print("Config resetada para defaults")
     elif args.export:
         out = Path(args.export)
-        out.write_text(json.dumps(cfg, indent=2, ensure_ascii=False), encoding="utf-8")
+        out.write_bytes(_json_dumps(cfg))
         print(f"Config exportada para {out}")
     elif args.describe:
         print(DOCS.get(args.describe, "Sem documentação disponível"))
@@ -16,8 +16,9 @@ Features:
 import subprocess
 import os
 import hashlib
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 from pyport.logger import get_logger
 from pyport.sandbox import Sandbox
@@ -32,12 +33,19 @@ class ConfigureError(Exception):
 
 def _hash_env(env: Dict[str, str]) -> str:
     """Generate a hash of env vars to detect changes"""
-    env_str = "|".join(f"{k}={v}" for k, v in sorted(env.items()))
-    return hashlib.sha256(env_str.encode()).hexdigest()
-
-def _load_env(port: Dict[str, Any]) -> Dict[str, str]:
-    """Prepare build environment"""
+    # fed incrementally: no joined copy of the whole environment
+    h = hashlib.blake2b(digest_size=16)
+    for k in sorted(env):
+        h.update(k.encode())
+        h.update(b"=")
+        h.update(env[k].encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def _load_env(port: Dict[str, Any]) -> Tuple[Dict[str, str], bool]:
+    """Prepare build environment; also reports whether it differs from os.environ"""
     env = os.environ.copy()
+    modified = False
 
     # Toolchain integration
     toolchain = port.get("toolchain", "/mnt/tools")
@@ -45,32 +53,50 @@ def _load_env(port: Dict[str, Any]) -> Dict[str, str]:
         env["PATH"] = f"{toolchain}/bin:" + env["PATH"]
         env["LD_LIBRARY_PATH"] = f"{toolchain}/lib:" + env.get("LD_LIBRARY_PATH", "")
         env["PKG_CONFIG_PATH"] = f"{toolchain}/lib/pkgconfig:" + env.get("PKG_CONFIG_PATH", "")
+        modified = True
 
     # Flags
     for var in ["CFLAGS", "CXXFLAGS", "LDFLAGS"]:
         if port.get(var.lower()):
             env[var] = port[var.lower()]
-
-    return env
+            modified = True
+
+    return env, modified
+
+# marker file -> build system, in detection priority order
+_SYSTEM_MARKERS = (
+    ("configure", "autotools"),
+    ("CMakeLists.txt", "cmake"),
+    ("meson.build", "meson"),
+    ("Cargo.toml", "cargo"),
+    ("setup.py", "python"),
+)
+
+@lru_cache(maxsize=512)
+def _detect_system_cached(build_dir: str, mtime: int) -> str:
+    """Scan build_dir once; `mtime` is part of the key so edits invalidate it"""
+    try:
+        with os.scandir(build_dir) as it:
+            names = {e.name for e in it}
+    except OSError:
+        return "custom"
+    for marker, system in _SYSTEM_MARKERS:
+        if marker in names:
+            return system
+    if any(n.endswith(".java") for n in names):
+        return "java"
+    return "custom"
 
 def _detect_system(build_dir: Path) -> str:
     """Detect build system from files in source tree"""
-    if (build_dir / "configure").exists():
-        return "autotools"
-    elif (build_dir / "CMakeLists.txt").exists():
-        return "cmake"
-    elif (build_dir / "meson.build").exists():
-        return "meson"
-    elif (build_dir / "Cargo.toml").exists():
-        return "cargo"
-    elif (build_dir / "setup.py").exists():
-        return "python"
-    elif list(build_dir.glob("*.java")):
-        return "java"
-    else:
+    key = str(build_dir)
+    try:
+        mtime = os.stat(key).st_mtime_ns
+    except OSError:
         return "custom"
+    return _detect_system_cached(key, mtime)
 
-def _run_command(cmd: List[str], cwd: Path, env: Dict[str, str], sandbox: Optional[Sandbox], timeout: int = 1800):
+def _run_command(cmd: List[str], cwd: Path, env: Optional[Dict[str, str]], sandbox: Optional[Sandbox], timeout: int = 1800):
     """Run command inside sandbox or directly"""
     log.info(f"Executando: {' '.join(cmd)} (em {cwd})")
     try:
@@ -85,29 +111,29 @@ def _run_command(cmd: List[str], cwd: Path, env: Dict[str, str], sandbox: Option
 
 # ---------------- Build System Runners ----------------
 
-def _run_autotools(build_dir: Path, env: Dict[str, str], sandbox: Optional[Sandbox], extra_args: List[str]):
+def _run_autotools(build_dir: Path, env: Optional[Dict[str, str]], sandbox: Optional[Sandbox], extra_args: List[str]):
     cmd = ["./configure", "--prefix=/usr"] + extra_args
     _run_command(cmd, build_dir, env, sandbox)
 
-def _run_cmake(build_dir: Path, env: Dict[str, str], sandbox: Optional[Sandbox], extra_args: List[str]):
+def _run_cmake(build_dir: Path, env: Optional[Dict[str, str]], sandbox: Optional[Sandbox], extra_args: List[str]):
     cmd = ["cmake", ".", "-DCMAKE_INSTALL_PREFIX=/usr"] + extra_args
     _run_command(cmd, build_dir, env, sandbox)
 
-def _run_meson(build_dir: Path, env: Dict[str, str], sandbox: Optional[Sandbox], extra_args: List[str]):
+def _run_meson(build_dir: Path, env: Optional[Dict[str, str]], sandbox: Optional[Sandbox], extra_args: List[str]):
     build_subdir = build_dir / "build"
     build_subdir.mkdir(exist_ok=True)
     cmd = ["meson", "setup", str(build_subdir), "--prefix=/usr"] + extra_args
     _run_command(cmd, build_dir, env, sandbox)
 
-def _run_cargo(build_dir: Path, env: Dict[str, str], sandbox: Optional[Sandbox], extra_args: List[str]):
+def _run_cargo(build_dir: Path, env: Optional[Dict[str, str]], sandbox: Optional[Sandbox], extra_args: List[str]):
     cmd = ["cargo", "build", "--release"] + extra_args
     _run_command(cmd, build_dir, env, sandbox)
 
-def _run_python(build_dir: Path, env: Dict[str, str], sandbox: Optional[Sandbox], extra_args: List[str]):
+def _run_python(build_dir: Path, env: Optional[Dict[str, str]], sandbox: Optional[Sandbox], extra_args: List[str]):
     cmd = ["python3", "setup.py", "build"] + extra_args
     _run_command(cmd, build_dir, env, sandbox)
 
-def _run_java(build_dir: Path, env: Dict[str, str], sandbox: Optional[Sandbox], extra_args: List[str]):
+def _run_java(build_dir: Path, env: Optional[Dict[str, str]], sandbox: Optional[Sandbox], extra_args: List[str]):
     java_files = [str(f) for f in build_dir.glob("*.java")]
     if not java_files:
         raise ConfigureError("Nenhum arquivo .java encontrado")
@@ -121,49 +147,59 @@ def configure(port: Dict[str, Any], build_dir: Path, sandbox: Optional[Sandbox]
     Run the configure step for the given port.
     """
     portname = port.get("name", "unknown")
-    system = port.get("build_system")
-    if not system:
-        system = _detect_system(build_dir)
     extra_args = port.get("configure_args", [])
-    env = _load_env(port)
+    env, env_modified = _load_env(port)
 
     cache_file = build_dir / ".configure_done"
-    env_hash = _hash_env(env)
-
-    # Skip if already configured
-    if cache_file.exists() and not force:
-        prev_hash = cache_file.read_text().strip()
-        if prev_hash == env_hash:
-            log.info(f"[{portname}] Configuração já feita, pulando")
-            return
+    env_hash = None
+
+    # Skip if already configured (env is only hashed when there is a cache to compare)
+    if not force:
+        try:
+            prev_hash = cache_file.read_text().strip()
+        except FileNotFoundError:
+            prev_hash = None
+        if prev_hash is not None:
+            env_hash = _hash_env(env)
+            if prev_hash == env_hash:
+                log.info(f"[{portname}] Configuração já feita, pulando")
+                return
+
+    # Detect only when actually configuring
+    system = port.get("build_system") or _detect_system(build_dir)
+
+    # Unchanged environment: let children inherit os.environ (no per-spawn envp build)
+    run_env = env if env_modified else None
 
     log.info(f"[{portname}] Configurando build system: {system}")
 
     # Run pre-configure hooks
-    run_hook(port, "configure_env", build_dir, sandbox)
-    run_hook(port, "pre_configure", build_dir, sandbox)
+    run_hook("configure_env", port, sandbox)
+    run_hook("pre_configure", port, sandbox)
 
     if system == "autotools":
-        _run_autotools(build_dir, env, sandbox, extra_args)
+        _run_autotools(build_dir, run_env, sandbox, extra_args)
     elif system == "cmake":
-        _run_cmake(build_dir, env, sandbox, extra_args)
+        _run_cmake(build_dir, run_env, sandbox, extra_args)
     elif system == "meson":
-        _run_meson(build_dir, env, sandbox, extra_args)
+        _run_meson(build_dir, run_env, sandbox, extra_args)
     elif system == "cargo":
-        _run_cargo(build_dir, env, sandbox, extra_args)
+        _run_cargo(build_dir, run_env, sandbox, extra_args)
     elif system == "python":
-        _run_python(build_dir, env, sandbox, extra_args)
+        _run_python(build_dir, run_env, sandbox, extra_args)
     elif system == "java":
-        _run_java(build_dir, env, sandbox, extra_args)
+        _run_java(build_dir, run_env, sandbox, extra_args)
     elif system == "custom":
         log.info(f"[{portname}] Usando configuração custom (via hooks)")
     else:
         raise ConfigureError(f"Sistema de build desconhecido: {system}")
 
     # Run post-configure hooks
-    run_hook(port, "post_configure", build_dir, sandbox)
+    run_hook("post_configure", port, sandbox)
 
     # Save cache
+    if env_hash is None:
+        env_hash = _hash_env(env)
     cache_file.write_text(env_hash)
 
     log.info(f"[{portname}] Configuração concluída")
@@ -180,8 +216,7 @@ def _cli():
     args = parser.parse_args()
 
     try:
-        with open(args.portfile, "r", encoding="utf-8") as f:
-            port = yaml.safe_load(f) or {}
+        port = yaml.load(Path(args.portfile).read_bytes(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
     except Exception as e:
         log.error(f"Erro ao carregar Portfile: {e}")
         sys.exit(1)
@@ -15,11 +15,30 @@ import os
 import sys
 import json
 import time
+import hashlib
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    import msgpack  # cache binário dos Portfiles já parseados
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson  # formato do cache quando msgpack não está disponível
+except ImportError:
+    orjson = None
+
 from pyport.logger import get_logger
 from pyport.config import get_config
 from pyport.dependency import DependencyGraph
@@ -32,10 +51,107 @@ from pyport.packager import package_from_metadata
 from pyport.install import install_package
 from pyport.remove import remove_package
 from pyport.hooks import run_hook
-from pyport.sandbox import Sandbox
+from pyport.sandbox_pool import get_pool
+from pyport.installdb import open_installed_db
+from pyport.portindex import iter_portfiles
 
 LOG = get_logger("pyport.core")
 
+# path -> ((st_mtime_ns, st_size), metadados); compartilhado, não modificar o dict retornado
+_portfile_cache: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+# Portfiles já parseados, fora da árvore de ports: <blake2b(caminho)>.mp (ou .json sem msgpack)
+# com {"key": [mtime_ns, size] do Portfile, "data": metadados}
+PORTFILE_CACHE_DIR = Path("/pyport/cache/portfiles")
+_PORTFILE_CACHE_EXT = ".mp" if msgpack else ".json"
+
+
+def _decode_portfile_cache(raw: bytes) -> Any:
+    if msgpack:
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def _encode_portfile_cache(data: Dict[str, Any]) -> bytes:
+    if msgpack:
+        return msgpack.packb(data, use_bin_type=True)
+    return orjson.dumps(data) if orjson else json.dumps(data).encode("utf-8")
+
+
+def _load_portfile_cached(path: Path) -> Dict[str, Any]:
+    """
+    Lê um Portfile.yaml uma vez por (mtime, tamanho). Usa o cache em PORTFILE_CACHE_DIR
+    quando ele registra exatamente o (mtime, tamanho) atual do YAML; caso contrário
+    parseia o YAML e regrava o cache.
+    """
+    st = path.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    entry = _portfile_cache.get(path)
+    if entry and entry[0] == key:
+        return entry[1]
+
+    digest = hashlib.blake2b(str(path).encode(), digest_size=16).hexdigest()
+    cache = PORTFILE_CACHE_DIR / f"{digest}{_PORTFILE_CACHE_EXT}"
+    data = None
+    try:
+        stored = _decode_portfile_cache(cache.read_bytes())
+        # comparação exata: um Portfile trocado por outro com mtime antigo (tar -x,
+        # rsync -t, checkout) também invalida
+        if isinstance(stored, dict) and stored.get("key") == list(key):
+            data = stored.get("data")
+    except Exception:
+        data = None  # ausente, antigo ou corrompido: parseia de novo
+
+    if not isinstance(data, dict):
+        data = yaml.load(path.read_bytes(), Loader=_YamlLoader) or {}
+        try:
+            raw = _encode_portfile_cache({"key": list(key), "data": data})
+            PORTFILE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(raw)
+            os.replace(tmp, cache)
+        except (OSError, TypeError, ValueError):
+            pass  # cache sem permissão de escrita ou valores sem representação binária
+
+    _portfile_cache[path] = (key, data)
+    return data
+
+
+# ordem de instalação resolvida, por port e assinatura da árvore de ports
+RESOLVE_CACHE_DIR = Path("/pyport/cache")
+
+
+def _tree_signature(root: Path) -> str:
+    """Hash de (caminho, mtime, tamanho) de todos os Portfiles: muda a cada edição/sync."""
+    stamps = []
+    for e in iter_portfiles(root):
+        st = e.stat()
+        stamps.append(f"{e.path}\0{st.st_mtime_ns}\0{st.st_size}\n")
+    h = hashlib.blake2b(digest_size=16)
+    for line in sorted(stamps):
+        h.update(line.encode())
+    return h.hexdigest()
+
+
+def _clear_resolve_cache():
+    try:
+        for e in os.scandir(RESOLVE_CACHE_DIR):
+            if e.name.startswith("resolve-") and e.name.endswith(".json"):
+                os.unlink(e.path)
+    except OSError:
+        pass
+
+
+# downloads antecipados enquanto a onda anterior compila
+_PREFETCH_WORKERS = 4
+
+
+def _build_one(job: Tuple[str, bool, bool]) -> Tuple[str, bool]:
+    """Worker de build paralelo: cada processo usa seu próprio Core/sandbox."""
+    name, force, dry_run = job
+    return name, Core().build(name, force=force, dry_run=dry_run, with_deps=False)
+
+
 class Core:
     """
     Classe central para operações principais do PyPort
@@ -45,25 +161,106 @@ class Core:
         self.cfg = get_config()
         self.ports_root = Path(self.cfg["paths"]["ports"])
         self.sandbox_root = Path(self.cfg["paths"]["sandbox"])
-        self.installed_db_path = Path(self.cfg["paths"]["db"]) / "installed.json"
+        self.installed_db = open_installed_db(Path(self.cfg["paths"]["db"]))
+        self.installed_db_path = self.installed_db.path
 
     def load_installed(self) -> Dict[str, Any]:
-        if self.installed_db_path.exists():
-            try:
-                return json.loads(self.installed_db_path.read_text(encoding="utf-8"))
-            except Exception as e:
-                LOG.error(f"Erro lendo DB instalado: {e}")
+        try:
+            return self.installed_db.all()
+        except Exception as e:
+            LOG.error(f"Erro lendo DB instalado: {e}")
         return {}
 
     def save_installed(self, db: Dict[str, Any]):
-        self.installed_db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.installed_db_path.write_text(json.dumps(db, indent=2), encoding="utf-8")
+        self.installed_db.replace_all(db)
+
+    def mark_installed(self, name: str, entry: Dict[str, Any]):
+        # uma linha via INSERT OR REPLACE; o SQLite (WAL) serializa escritores concorrentes
+        self.installed_db.put(name, entry)
+
+    def _resolve(self, name: str) -> Dict[str, Any]:
+        """
+        Resolve as dependências de `name` (ordem + ondas). Resultados bem-sucedidos
+        ficam em RESOLVE_CACHE_DIR, válidos enquanto a árvore de ports não mudar,
+        evitando recarregar e parsear a árvore inteira a cada build.
+        """
+        prefix = f"resolve-{name.replace(os.sep, '_')}-"
+        cache = RESOLVE_CACHE_DIR / f"{prefix}{_tree_signature(self.ports_root)}.json"
+        try:
+            return json.loads(cache.read_bytes())
+        except (OSError, ValueError):
+            pass
+
+        dg = DependencyGraph(persist=True)
+        dg.load_ports_tree(self.ports_root)
+        res = dg.resolve(name)
+        if res.get("ok", False):
+            try:
+                RESOLVE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                for e in os.scandir(RESOLVE_CACHE_DIR):
+                    if e.name.startswith(prefix):
+                        os.unlink(e.path)  # assinaturas antigas deste port
+                tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(res), encoding="utf-8")
+                os.replace(tmp, cache)
+            except OSError as e:
+                LOG.debug(f"Cache de resolução não gravado: {e}")
+        return res
+
+    def _prefetch(self, name: str):
+        """Baixa as fontes de `name` para o cache de distfiles; erros ficam para o build."""
+        try:
+            fetch_sources(_load_portfile_cached(self.ports_root / name / "Portfile.yaml"))
+        except Exception as e:
+            LOG.debug(f"Pré-download de {name} falhou: {e}")
+
+    def _build_waves(self, name: str, levels: List[List[str]], force: bool, dry_run: bool) -> bool:
+        """
+        Constrói as dependências nível a nível; ports de um mesmo nível em paralelo.
+        As fontes de todos os níveis (e de `name`) são baixadas em segundo plano,
+        em ordem, de modo que o download de uma onda se sobrepõe à compilação da anterior.
+        """
+        installed = set() if force else self.installed_db.names()
+        io = ThreadPoolExecutor(max_workers=_PREFETCH_WORKERS)
+        try:
+            fetches = {dep: io.submit(self._prefetch, dep)
+                       for wave in levels + [[name]] for dep in wave if dep not in installed}
+            for wave in levels:
+                wave = [dep for dep in wave if dep != name]
+                if not force:
+                    # uma consulta por onda em vez de um worker + Portfile por dependência já instalada
+                    installed = self.installed_db.names()
+                    wave = [dep for dep in wave if dep not in installed]
+                if not wave:
+                    continue
+                # o worker só começa com os distfiles completos (sem corrida no mesmo arquivo)
+                wait([fetches[dep] for dep in wave if dep in fetches])
+                LOG.info(f"Construindo dependências: {', '.join(wave)}")
+                jobs = [(dep, force, dry_run) for dep in wave]
+                if len(jobs) == 1:
+                    results = [_build_one(jobs[0])]
+                else:
+                    # forkserver: este processo tem threads vivas (pré-download, refill do pool
+                    # de sandboxes); um fork copiaria locks (logging, _DBS_LOCK, _POOLS_LOCK) presos
+                    with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1),
+                                             mp_context=multiprocessing.get_context("forkserver")) as ex:
+                        results = list(ex.map(_build_one, jobs))
+                failed = [dep for dep, ok in results if not ok]
+                if failed:
+                    LOG.error(f"Falha ao construir dependência(s) {', '.join(failed)}")
+                    return False
+            return True
+        finally:
+            # espera os downloads em andamento e descarta os que ainda não começaram (inclusive
+            # o de `name`, se ainda na fila): na falha build() retorna False sem construir
+            # `name`; no sucesso o fetch do próprio build() baixa o que tiver sido descartado
+            io.shutdown(wait=True, cancel_futures=True)
 
     def is_installed(self, name: str) -> bool:
-        db = self.load_installed()
-        return name in db
+        return self.installed_db.contains(name)
 
-    def build(self, portname: str, force: bool = False, dry_run: bool = False) -> bool:
+    def build(self, portname: str, force: bool = False, dry_run: bool = False,
+              with_deps: bool = True) -> bool:
         name = portname
         LOG.info(f"Build iniciado: {name}, force={force}, dry_run={dry_run}")
 
@@ -74,7 +271,7 @@ class Core:
             return False
 
         try:
-            meta = yaml.safe_load(pf.read_text(encoding="utf-8"))
+            meta = _load_portfile_cached(pf)
         except Exception as e:
             LOG.error(f"Erro lendo Portfile {pf}: {e}")
             return False
@@ -86,29 +283,28 @@ class Core:
             LOG.info(f"{name} já instalado (versão possivelmente {version}), pulando build.")
             return True
 
-        # Resolver dependências
-        dg = DependencyGraph(persist=True)
-        dg.load_ports_tree(self.ports_root)
-        res = dg.resolve(name)
-        if not res.get("ok", False):
-            LOG.error(f"Falha na resolução de dependências para {name}")
-            LOG.debug(f"Missing: {res.get('missing')}, cycles: {res.get('cycles')}, conflicts: {res.get('conflicts')}")
-            return False
+        # Resolver dependências (with_deps=False: já construídas pelo chamador)
+        if with_deps:
+            res = self._resolve(name)
+            if not res.get("ok", False):
+                LOG.error(f"Falha na resolução de dependências para {name}")
+                LOG.debug(f"Missing: {res.get('missing')}, cycles: {res.get('cycles')}, conflicts: {res.get('conflicts')}")
+                return False
 
-        # Construir dependências primeiro
-        for dep in res["order"]:
-            if dep == name:
-                continue
-            LOG.info(f"Construindo dependência: {dep}")
-            if not self.build(dep, force=force, dry_run=dry_run):
-                LOG.error(f"Falha ao construir dependência {dep}")
+            # o sandbox de `name` (o único que este processo usa) é preparado em segundo
+            # plano enquanto as dependências são construídas nos workers
+            get_pool(self.sandbox_root, int(self.cfg.get("sandbox", {}).get("pool_size", 4)), jobs=1)
+
+            # Construir dependências primeiro, em ondas topológicas
+            levels = res.get("levels") or [[dep] for dep in res["order"]]
+            if not self._build_waves(name, levels, force, dry_run):
                 return False
 
-        # Preparar sandbox
-        sandbox_dir = self.sandbox_root / f"{name}-{version}"
-        sb = Sandbox(str(sandbox_dir), force_clean=force)
+        # Preparar sandbox (pré-preparado pelo pool acima quando possível)
+        # workers de _build_waves (with_deps=False) constroem um só port: pool sem thread
+        pool = get_pool(self.sandbox_root, 0)
         try:
-            sb.prepare()
+            sb = pool.acquire()
         except Exception as e:
             LOG.error(f"Falha ao preparar sandbox para {name}: {e}")
             return False
@@ -168,9 +364,8 @@ class Core:
             run_hook(meta, "post_build_end", sb)
 
             # Marcar instalado no DB
-            db = self.load_installed()
-            db[name] = {"version": version, "pkg": str(pkg), "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
-            self.save_installed(db)
+            self.mark_installed(name, {"version": version, "pkg": str(pkg),
+                                       "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
 
             LOG.info(f"Build de {name} finalizado com sucesso.")
 
@@ -189,10 +384,7 @@ class Core:
             return False
 
         finally:
-            try:
-                sb.destroy(clean=not self.cfg.get("sandbox", {}).get("keep", False))
-            except Exception as e:
-                LOG.warning(f"Erro destruindo sandbox para {name}: {e}")
+            pool.release(sb, clean=not self.cfg.get("sandbox", {}).get("keep", False))
 
     def remove(self, portname: str, force: bool = False, dry_run: bool = False, yes: bool = False) -> bool:
         LOG.info(f"Remover iniciado: {portname}, force={force}, dry_run={dry_run}, yes={yes}")
@@ -220,9 +412,18 @@ class Core:
         ports = self.ports_root
         try:
             if (ports / ".git").exists():
-                subprocess.run(["git", "-C", str(ports), "fetch", "--all"], check=True)
-                subprocess.run(["git", "-C", str(ports), "checkout", branch], check=True)
+                # já no branch certo (lido de .git/HEAD, sem processo): um único `git pull`
+                try:
+                    head = (ports / ".git" / "HEAD").read_text().strip()
+                except OSError:
+                    head = ""
+                if head != f"ref: refs/heads/{branch}":
+                    if subprocess.run(["git", "-C", str(ports), "checkout", branch]).returncode != 0:
+                        # branch ainda não buscado: fetch e nova tentativa
+                        subprocess.run(["git", "-C", str(ports), "fetch", "--all"], check=True)
+                        subprocess.run(["git", "-C", str(ports), "checkout", branch], check=True)
                 subprocess.run(["git", "-C", str(ports), "pull", "origin", branch], check=True)
+                _clear_resolve_cache()
                 LOG.info("Sync via git concluído")
                 return True
             else:
@@ -238,40 +439,48 @@ class Core:
             LOG.error(f"Portfile não encontrado para {portname}")
             return
         try:
-            meta = yaml.safe_load(pf.read_text(encoding="utf-8"))
+            meta = _load_portfile_cached(pf)
         except Exception as e:
             LOG.error(f"Erro lendo Portfile {portname}: {e}")
             return
         name = meta.get("name", portname)
         version = meta.get("version", "unknown")
         deps = meta.get("depends", [])
-        installed = self.load_installed()
-        status = "installed" if name in installed else "not installed"
+        entry = self.installed_db.get(name)
+        status = "installed" if entry is not None else "not installed"
         LOG.info(f"Port: {name}")
         LOG.info(f" Version: {version}")
         LOG.info(f" Dependências: {deps}")
         LOG.info(f" Status: {status}")
         if status == "installed":
-            LOG.info(f" Instalado versão: {installed[name].get('version')}")
+            LOG.info(f" Instalado versão: {entry.get('version')}")
         # show update info if present
         if "update" in meta:
             LOG.info(f" Pode atualizar via: {meta['update']}")
 
     def list_ports(self) -> None:
-        if not self.ports_root.exists():
+        # DirEntry.is_dir() usa o d_type do getdents: sem stat por entrada
+        try:
+            with os.scandir(self.ports_root) as it:
+                dirs = sorted((e for e in it if e.is_dir()), key=lambda e: e.name)
+        except FileNotFoundError:
             LOG.error(f"Pasta de ports não encontrada: {self.ports_root}")
             return
-        for d in sorted(self.ports_root.iterdir()):
-            if d.is_dir():
-                pf = d / "Portfile.yaml"
-                if pf.exists():
-                    try:
-                        meta = yaml.safe_load(pf.read_text(encoding="utf-8"))
-                        name = meta.get("name", d.name)
-                        version = meta.get("version", "unknown")
-                        print(f"{name} - {version}")
-                    except Exception as e:
-                        print(f"{d.name} - erro ao ler versão: {e}")
+        for d in dirs:
+            pf = Path(d.path) / "Portfile.yaml"
+            try:
+                meta = _load_portfile_cached(pf)
+            except FileNotFoundError:
+                continue  # diretório sem Portfile
+            except Exception as e:
+                print(f"{d.name} - erro ao ler versão: {e}")
+                continue
+            try:
+                name = meta.get("name", d.name)
+                version = meta.get("version", "unknown")
+                print(f"{name} - {version}")
+            except Exception as e:
+                print(f"{d.name} - erro ao ler versão: {e}")
 
     # CLI exposta
     @staticmethod
@@ -18,14 +18,18 @@ Improvements included:
 
 from __future__ import annotations
 import os
+import sys
 import json
+import operator
 import time
 import tempfile
 import shutil
 import fcntl
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Set, Any, Iterable
+from typing import AbstractSet, Dict, List, Tuple, Optional, Set, Any, Iterable, Union
 from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Logging: prefer pyport.logger if available
 try:
@@ -50,9 +54,17 @@ DB_DIR.mkdir(parents=True, exist_ok=True)
 PERSIST_FILE = DB_DIR / "deps.json"
 LOCK_FILE = DB_DIR / "deps.lock"
 
+# Ports tree walk shared with the port index (stops at port directories)
+try:
+    from pyport.portindex import iter_portfiles, PORTFILE_NAME
+except Exception:
+    iter_portfiles = None
+    PORTFILE_NAME = "Portfile.yaml"
+
 # YAML parser if available
 try:
     import yaml
+    _YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)  # libyaml when built in
 except Exception:
     yaml = None
 
@@ -83,6 +95,12 @@ except Exception:
 
 # ----------------- Utility: constraint parsing & checking -----------------
 
+# requirement operators -> comparison; two-char operators first so ">=" wins over ">"
+_REQ_OPS = ((">=", operator.ge), ("<=", operator.le), ("==", operator.eq),
+            ("!=", operator.ne), (">", operator.gt), ("<", operator.lt))
+_OP_FUNCS = dict(_REQ_OPS)
+_REQ_OP_CHARS = frozenset("<>=!")
+
 def parse_requirement(req: Optional[str]) -> Optional[Tuple[str, str]]:
     """
     Parse simple requirement strings:
@@ -93,12 +111,22 @@ def parse_requirement(req: Optional[str]) -> Optional[Tuple[str, str]]:
     if req is None:
         return None
     s = str(req).strip()
-    for op in (">=", "<=", "==", "!=", ">", "<"):
+    for op, _ in _REQ_OPS:
         if s.startswith(op):
             return (op, s[len(op):].strip())
     # no operator => equality
     return ("==", s)
 
+@lru_cache(maxsize=4096)
+def _cached_ver(s: str):
+    return _parse_ver(s)
+
+@lru_cache(maxsize=4096)
+def _compiled_requirement(req: str) -> Tuple[str, str, Any]:
+    """(op, version string, parsed version) for a requirement, parsed once per distinct string"""
+    op, rval = parse_requirement(req)
+    return op, rval, _cached_ver(rval)
+
 def satisfies(candidate_version: Optional[str], requirement: Optional[str]) -> bool:
     """
     Check whether candidate_version satisfies requirement.
@@ -108,13 +136,9 @@ def satisfies(candidate_version: Optional[str], requirement: Optional[str]) -> b
         return True
     if candidate_version is None:
         return False
-    r = parse_requirement(requirement)
-    if r is None:
-        return True
-    op, rval = r
+    op, rval, pv_r = _compiled_requirement(str(requirement))
     # attempt parsing
-    pv_c = _parse_ver(candidate_version)
-    pv_r = _parse_ver(rval)
+    pv_c = _cached_ver(str(candidate_version))
     if pv_c is None or pv_r is None:
         # fallback: string compare if not parseable
         if op == "==":
@@ -125,24 +149,35 @@ def satisfies(candidate_version: Optional[str], requirement: Optional[str]) -> b
         return False
     # if using packaging.Version, comparisons are natural
     try:
-        if op == "==":
-            return pv_c == pv_r
-        if op == "!=":
-            return pv_c != pv_r
-        if op == ">":
-            return pv_c > pv_r
-        if op == "<":
-            return pv_c < pv_r
-        if op == ">=":
-            return pv_c >= pv_r
-        if op == "<=":
-            return pv_c <= pv_r
+        return bool(_OP_FUNCS[op](pv_c, pv_r))
     except Exception:
         return False
-    return False
 
 # ----------------- Core DependencyGraph -----------------
 
+def _intern(name: str) -> str:
+    # one shared object per package name: adj keys, edge targets and the reverse
+    # index compare by identity on dict/set lookups instead of comparing characters
+    return sys.intern(name) if type(name) is str else name
+
+def _drop_edges(edges: List[Tuple[str, Optional[str]]], dep: str):
+    # in place, from the end: usually a single matching edge, so no list rebuild
+    for i in range(len(edges) - 1, -1, -1):
+        if edges[i][0] == dep:
+            del edges[i]
+
+_NO_DEPENDENTS: AbstractSet[str] = frozenset()
+
+# memoized install_order results per graph
+_ORDER_CACHE_MAX = 128
+
+class CycleError(Exception):
+    """Raised by install_order when a dependency cycle is reachable from the targets"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("dependency cycle: " + " -> ".join(cycle))
+
 class DependencyGraph:
     """
     Directed dependency graph.
@@ -154,8 +189,10 @@ class DependencyGraph:
         self.adj: Dict[str, List[Tuple[str, Optional[str]]]] = defaultdict(list)
         self.meta: Dict[str, Dict[str, Any]] = {}
         self.persist = persist
-        # reverse cache
-        self._reverse_cache: Optional[Dict[str, Set[str]]] = None
+        # reverse index dep -> {pkg}, kept in sync with adj on every edge change
+        self._reverse: Dict[str, Set[str]] = defaultdict(set)
+        # install_order results by target set; cleared whenever adj changes
+        self._order_cache: Dict[Optional[Tuple[str, ...]], List[str]] = {}
         if persist:
             self._load()
 
@@ -184,9 +221,10 @@ class DependencyGraph:
             lf = self._acquire_lock()
             text = PERSIST_FILE.read_text(encoding="utf-8")
             j = json.loads(text)
-            self.adj = defaultdict(list, {k: [(d, req) for d, req in v] for k, v in j.get("adj", {}).items()})
+            self.adj = defaultdict(list, {_intern(k): [(_intern(d), req) for d, req in v] for k, v in j.get("adj", {}).items()})
             self.meta = j.get("meta", {})
-            self._reverse_cache = None
+            self._build_reverse()
+            self._order_cache.clear()
             LOG.debug("DependencyGraph loaded from persist")
         except Exception as e:
             LOG.warning(f"Failed to load deps persistence: {e}")
@@ -214,8 +252,10 @@ class DependencyGraph:
     def add_node(self, name: str, version: Optional[str] = None, provides: Optional[List[str]] = None,
                  conflicts: Optional[List[str]] = None, replaces: Optional[List[str]] = None,
                  source: Optional[str] = None, port_path: Optional[str] = None, available_versions: Optional[List[str]] = None):
+        name = _intern(name)
         if name not in self.adj:
             self.adj[name] = []
+            self._order_cache.clear()
         m = self.meta.setdefault(name, {})
         if version is not None:
             m["version"] = version
@@ -231,11 +271,11 @@ class DependencyGraph:
             m["port_path"] = port_path
         if available_versions:
             m["available_versions"] = available_versions
-        self._reverse_cache = None
         if self.persist:
             self._save()
 
     def add_edge(self, pkg: str, dep: str, requirement: Optional[str] = None):
+        pkg, dep = _intern(pkg), _intern(dep)
         self.add_node(pkg)
         self.add_node(dep)
         # avoid exact duplicates
@@ -243,25 +283,31 @@ class DependencyGraph:
             if d == dep and req == requirement:
                 return
         self.adj[pkg].append((dep, requirement))
-        self._reverse_cache = None
+        self._reverse[dep].add(pkg)
+        self._order_cache.clear()
         if self.persist:
             self._save()
 
     def remove_node(self, name: str):
-        if name in self.adj:
-            del self.adj[name]
-        for k in list(self.adj.keys()):
-            self.adj[k] = [(d, r) for (d, r) in self.adj[k] if d != name]
+        # only the node's own edges and its dependents are touched, not the whole graph
+        for d, _ in self.adj.pop(name, []):
+            if d in self._reverse:
+                self._reverse[d].discard(name)
+        for k in self._reverse.pop(name, set()):
+            if k != name and k in self.adj:
+                _drop_edges(self.adj[k], name)
         if name in self.meta:
             del self.meta[name]
-        self._reverse_cache = None
+        self._order_cache.clear()
         if self.persist:
             self._save()
 
     def remove_edge(self, pkg: str, dep: str):
         if pkg in self.adj:
-            self.adj[pkg] = [(d, r) for (d, r) in self.adj[pkg] if d != dep]
-        self._reverse_cache = None
+            _drop_edges(self.adj[pkg], dep)
+        if dep in self._reverse:
+            self._reverse[dep].discard(pkg)
+        self._order_cache.clear()
         if self.persist:
             self._save()
 
@@ -277,21 +323,33 @@ class DependencyGraph:
         return out
 
     # reverse dependencies (immediate or recursive)
-    def _build_reverse_cache(self):
+    def _build_reverse(self):
+        # full rebuild only when adj is replaced wholesale (load from persistence)
         r = defaultdict(set)
         for src, deps in self.adj.items():
             for dst, _ in deps:
                 r[dst].add(src)
-        self._reverse_cache = r
+        self._reverse = r
+
+    def dependents(self, name: str) -> AbstractSet[str]:
+        """
+        Direct dependents of `name` as a live view of the reverse index (no copy).
+        Like dict.keys(), it must not be mutated and changes with the graph;
+        wrap it in set()/sorted() to keep a snapshot.
+        """
+        return self._reverse.get(name, _NO_DEPENDENTS)
 
-    def reverse_dependencies(self, name: str, recursive: bool = True) -> List[str]:
-        if self._reverse_cache is None:
-            self._build_reverse_cache()
+    def reverse_dependencies(self, name: Union[str, Iterable[str]], recursive: bool = True) -> List[str]:
+        """
+        Packages depending on `name` (directly, or transitively if recursive).
+        `name` may also be several packages: one multi-source BFS with a shared
+        visited set instead of one traversal per package over overlapping ancestors.
+        """
         out = set()
-        q = deque([name])
+        q = deque([name] if isinstance(name, str) else name)
         while q:
             cur = q.popleft()
-            for p in self._reverse_cache.get(cur, set()):
+            for p in self.dependents(cur):
                 if p not in out:
                     out.add(p)
                     if recursive:
@@ -301,58 +359,140 @@ class DependencyGraph:
     # --------------- topological sort + cycle detection ----------------
     def topological_sort(self, subset: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         nodes = set(subset) if subset is not None else set(self.adj.keys())
-        indeg = {n: 0 for n in nodes}
+        indeg = dict.fromkeys(nodes, 0)
         missing = set()
+        # in-subset successors, filtered once so the Kahn loop below is just
+        # list iteration and int arithmetic (no adj lookups or membership tests)
+        succ: Dict[str, List[str]] = {}
         for n in nodes:
-            for (dst, _) in self.adj.get(n, []):
-                if dst not in nodes:
+            out = succ[n] = []
+            for (dst, _) in self.adj.get(n, ()):
+                if dst in indeg:
+                    out.append(dst)
+                    indeg[dst] += 1
+                else:
                     missing.add(dst)
-                    continue
-                indeg[dst] = indeg.get(dst, 0) + 1
         q = deque([n for n, d in indeg.items() if d == 0])
         order = []
+        append, popleft = q.append, q.popleft
         while q:
-            n = q.popleft()
+            n = popleft()
             order.append(n)
-            for (dst, _) in self.adj.get(n, []):
-                if dst not in nodes:
-                    continue
-                indeg[dst] -= 1
-                if indeg[dst] == 0:
-                    q.append(dst)
+            for dst in succ[n]:
+                d = indeg[dst] - 1
+                indeg[dst] = d
+                if d == 0:
+                    append(dst)
         if len(order) != len(nodes):
             cycles = self._find_cycles(nodes)
             return {"order": order, "cycles": cycles, "missing": sorted(list(missing))}
         return {"order": order, "cycles": [], "missing": sorted(list(missing))}
 
+    def install_order(self, targets: Optional[Iterable[str]] = None, include_optional: bool = True) -> List[str]:
+        """
+        Install order for `targets` (whole graph if None): dependencies before dependents,
+        each node once. Iterative DFS post-order, so collecting the reachable nodes and
+        ordering them is a single traversal. Raises CycleError on a reachable cycle.
+        include_optional is accepted for API compatibility (edges carry no optional flag).
+        Results are memoized per target sequence until the graph changes (the order of
+        `targets` shapes the result, so it is part of the key).
+        """
+        if targets is not None:
+            targets = list(targets)
+        key = tuple(targets) if targets is not None else None
+        cached = self._order_cache.get(key)
+        if cached is None:
+            cached = self._install_order(targets)
+            if len(self._order_cache) >= _ORDER_CACHE_MAX:
+                del self._order_cache[next(iter(self._order_cache))]  # oldest entry
+            self._order_cache[key] = cached
+        return list(cached)
+
+    def _install_order(self, targets: Optional[Iterable[str]]) -> List[str]:
+        GRAY, BLACK = 1, 2
+        color: Dict[str, int] = {}
+        order: List[str] = []
+        for t in (list(self.adj) if targets is None else targets):
+            if t in color:
+                continue
+            color[t] = GRAY
+            path = [t]
+            stack = [iter(self.adj.get(t, ()))]
+            while stack:
+                for dep, _ in stack[-1]:
+                    c = color.get(dep)
+                    if c is None:
+                        color[dep] = GRAY
+                        path.append(dep)
+                        stack.append(iter(self.adj.get(dep, ())))
+                        break
+                    if c == GRAY:
+                        raise CycleError(path[path.index(dep):] + [dep])
+                else:
+                    # all deps emitted: post-order position
+                    stack.pop()
+                    node = path.pop()
+                    color[node] = BLACK
+                    order.append(node)
+        return order
+
+    def install_levels(self, subset: Optional[Iterable[str]] = None) -> List[List[str]]:
+        """
+        Group nodes into install waves (Kahn by level): every node's dependencies
+        are in earlier waves, so nodes within one wave can be built concurrently.
+        Nodes on cycles are left out.
+        """
+        nodes = set(subset) if subset is not None else set(self.adj.keys())
+        pending = {}
+        dependents = defaultdict(list)
+        for n in nodes:
+            deps = {dst for (dst, _) in self.adj.get(n, []) if dst in nodes}
+            pending[n] = len(deps)
+            for dst in deps:
+                dependents[dst].append(n)
+        level = sorted(n for n, c in pending.items() if c == 0)
+        levels = []
+        while level:
+            levels.append(level)
+            nxt = []
+            for n in level:
+                for p in dependents.get(n, []):
+                    pending[p] -= 1
+                    if pending[p] == 0:
+                        nxt.append(p)
+            level = sorted(nxt)
+        return levels
+
     def _find_cycles(self, nodes: Set[str]) -> List[List[str]]:
+        # iterative DFS ((node, edge iterator) stack): deep chains don't hit the recursion limit
         visited = set()
         onstack = set()
-        stack = []
+        path = []
         cycles = []
 
-        def dfs(u):
-            visited.add(u)
-            onstack.add(u)
-            stack.append(u)
-            for (v, _) in self.adj.get(u, []):
-                if v not in nodes:
-                    continue
-                if v not in visited:
-                    dfs(v)
-                elif v in onstack:
-                    # extract cycle
-                    try:
-                        idx = stack.index(v)
-                        cycles.append(stack[idx:].copy())
-                    except ValueError:
-                        pass
-            stack.pop()
-            onstack.remove(u)
-
         for n in nodes:
-            if n not in visited:
-                dfs(n)
+            if n in visited:
+                continue
+            visited.add(n)
+            onstack.add(n)
+            path.append(n)
+            stack = [iter(self.adj.get(n, ()))]
+            while stack:
+                for (v, _) in stack[-1]:
+                    if v not in nodes:
+                        continue
+                    if v not in visited:
+                        visited.add(v)
+                        onstack.add(v)
+                        path.append(v)
+                        stack.append(iter(self.adj.get(v, ())))
+                        break
+                    if v in onstack:
+                        # extract cycle
+                        cycles.append(path[path.index(v):])
+                else:
+                    stack.pop()
+                    onstack.discard(path.pop())
         return cycles
 
     # --------------- conflict detection ----------------
@@ -360,17 +500,17 @@ class DependencyGraph:
         nodes = set(subset) if subset is not None else set(self.adj.keys())
         conflicts = []
         for n in nodes:
-            # collect requirements on n from parents inside nodes
-            reqs = []
-            for parent in nodes:
-                for (dst, req) in self.adj.get(parent, []):
-                    if dst == n:
-                        reqs.append((parent, req))
+            # collect requirements on n from parents inside nodes (via the reverse index,
+            # not a scan of every node's edges); unconstrained edges can't conflict
+            reqs = [(parent, req)
+                    for parent in self.dependents(n) if parent in nodes
+                    for (dst, req) in self.adj.get(parent, ()) if dst == n and req]
+            if len({r for _, r in reqs}) < 2:
+                continue  # common case: no or identical requirements, no pairwise pass
             # if multiple different requirements that cannot be satisfied simultaneously, record conflict
             for i in range(len(reqs)):
                 for j in range(i + 1, len(reqs)):
-                    r1 = reqs[i][1]; r2 = reqs[j][1]
-                    if r1 and r2 and r1 != r2:
+                    if reqs[i][1] != reqs[j][1]:
                         conflicts.append({"node": n, "requirements": [reqs[i], reqs[j]]})
         return conflicts
 
@@ -381,6 +521,7 @@ class DependencyGraph:
         Returns dict:
           - ok: bool
           - order: list of packages in install order (root's dependencies first)
+          - levels: the same packages grouped into waves that can be built in parallel
           - missing: referenced but absent packages
           - cycles: list of cycles if any
           - conflicts: list of conflicts if any
@@ -389,34 +530,32 @@ class DependencyGraph:
         if root not in self.adj:
             return {"ok": False, "message": f"root '{root}' not in graph", "order": [], "missing": [], "cycles": [], "conflicts": []}
 
-        # gather reachable nodes
-        visited = set()
-        stack = [root]
-        while stack:
-            n = stack.pop()
-            if n in visited:
-                continue
-            visited.add(n)
-            for (dep, _) in self.adj.get(n, []):
-                stack.append(dep)
-
-        # detect cycles
-        topo = self.topological_sort(subset=visited)
-        cycles = topo.get("cycles", [])
-        missing = topo.get("missing", [])
-        if cycles:
-            return {"ok": False, "message": "cycles detected", "order": topo.get("order", []), "missing": missing, "cycles": cycles, "conflicts": []}
+        # reachable nodes and dependencies-first order in one DFS
+        try:
+            install_order = self.install_order([root])
+        except CycleError:
+            # slow path only on failure: gather reachable nodes and report every cycle
+            visited = set()
+            stack = [root]
+            while stack:
+                n = stack.pop()
+                if n in visited:
+                    continue
+                visited.add(n)
+                for (dep, _) in self.adj.get(n, []):
+                    stack.append(dep)
+            missing = sorted(n for n in visited if n not in self.adj)
+            return {"ok": False, "message": "cycles detected", "order": [], "missing": missing, "cycles": self._find_cycles(visited), "conflicts": []}
+        visited = set(install_order)
+        missing = sorted(n for n in install_order if n not in self.adj)
 
         # detect conflicts
         conflicts = self.detect_conflicts(subset=visited)
         if conflicts:
-            return {"ok": False, "message": "conflicts detected", "order": topo.get("order", []), "missing": missing, "cycles": [], "conflicts": conflicts}
+            return {"ok": False, "message": "conflicts detected", "order": install_order, "missing": missing, "cycles": [], "conflicts": conflicts}
 
-        # If here, we can produce order: topo.order but we want dependencies first => reverse
-        order = topo.get("order", [])
-        # topological_sort returns nodes where edges point to dependencies (pkg -> dep). The order from Kahn puts packages before deps? We used indegree count as edges into dst -> so order yields nodes with zero indegree first: roots before deps. We want install deps before dependents: reverse order.
-        install_order = list(reversed(order))
-        return {"ok": True, "order": install_order, "missing": missing, "cycles": [], "conflicts": []}
+        levels = self.install_levels(subset=visited)
+        return {"ok": True, "order": install_order, "levels": levels, "missing": missing, "cycles": [], "conflicts": []}
 
     # --------------- ports tree import ----------------
     def _parse_dep_item(self, dep) -> Tuple[Optional[str], Optional[str]]:
@@ -431,7 +570,10 @@ class DependencyGraph:
             req = dep.get("version") or dep.get("requirement")
             return (name, req)
         s = str(dep)
-        for op in (">=", "<=", "==", "!=", ">", "<"):
+        if _REQ_OP_CHARS.isdisjoint(s):
+            # plain package name (the common case): no operator scan
+            return (s.strip(), None)
+        for op, _ in _REQ_OPS:
             if op in s:
                 parts = s.split(op, 1)
                 return (parts[0].strip(), op + parts[1].strip())
@@ -447,33 +589,57 @@ class DependencyGraph:
             LOG.warning(f"ports root not found: {root}")
             return
 
-        if yaml is None:
+        # JSON portfiles (e.g. pattern="Portfile.json") need no YAML parser at all
+        json_only = pattern.lower().endswith(".json")
+        if yaml is None and not json_only:
             LOG.warning("pyyaml not available: cannot parse Portfile.yaml")
             return
 
-        count = 0
-        for pf in root.rglob(pattern):
+        if pattern == PORTFILE_NAME and iter_portfiles is not None:
+            files = [Path(e.path) for e in iter_portfiles(root)]
+        else:
+            files = list(root.rglob(pattern))
+
+        def parse(pf: Path):
+            # one read + parse per file, off the main thread; the graph is only touched below
             try:
-                data = yaml.safe_load(pf.read_text(encoding="utf-8")) or {}
-                name = data.get("name") or data.get("pkgname") or pf.parent.name
-                version = data.get("version") or data.get("pkgver")
-                provides = data.get("provides") or data.get("provides_list") or []
-                conflicts = data.get("conflicts") or []
-                replaces = data.get("replaces") or []
-                self.add_node(name, version=version, provides=provides, conflicts=conflicts,
-                              replaces=replaces, source=data.get("homepage"), port_path=str(pf.parent))
-                # collect dependency lists
-                for key in ("depends", "depends_build", "depends_run", "depends_lib", "depends_pkg"):
-                    deps = data.get(key, []) or []
-                    if isinstance(deps, str):
-                        deps = [deps]
-                    for dep in deps:
-                        depname, req = self._parse_dep_item(dep)
-                        if depname:
-                            self.add_edge(name, depname, requirement=req)
-                count += 1
+                raw = pf.read_bytes()
+                if pf.suffix.lower() == ".json":
+                    return pf, json.loads(raw) or {}, None
+                return pf, yaml.load(raw, Loader=_YamlLoader) or {}, None
             except Exception as e:
-                LOG.debug(f"failed parsing {pf}: {e}")
+                return pf, None, e
+
+        count = 0
+        persist, self.persist = self.persist, False  # save once at the end, not per node/edge
+        try:
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as ex:
+                for pf, data, err in ex.map(parse, files):
+                    if err is not None:
+                        LOG.debug(f"failed parsing {pf}: {err}")
+                        continue
+                    try:
+                        name = data.get("name") or data.get("pkgname") or pf.parent.name
+                        version = data.get("version") or data.get("pkgver")
+                        provides = data.get("provides") or data.get("provides_list") or []
+                        conflicts = data.get("conflicts") or []
+                        replaces = data.get("replaces") or []
+                        self.add_node(name, version=version, provides=provides, conflicts=conflicts,
+                                      replaces=replaces, source=data.get("homepage"), port_path=str(pf.parent))
+                        # collect dependency lists
+                        for key in ("depends", "depends_build", "depends_run", "depends_lib", "depends_pkg"):
+                            deps = data.get(key, []) or []
+                            if isinstance(deps, str):
+                                deps = [deps]
+                            for dep in deps:
+                                depname, req = self._parse_dep_item(dep)
+                                if depname:
+                                    self.add_edge(name, depname, requirement=req)
+                        count += 1
+                    except Exception as e:
+                        LOG.debug(f"failed parsing {pf}: {e}")
+        finally:
+            self.persist = persist
         LOG.info(f"Loaded {count} portfiles into dependency graph")
         if self.persist:
             self._save()
@@ -13,6 +13,8 @@ Features:
 
 import tarfile
 import zipfile
+import gzip
+import lzma
 import shutil
 import subprocess
 from pathlib import Path
@@ -22,6 +24,11 @@ from pyport.logger import get_logger
 from pyport.config import get_config
 from pyport.sandbox import Sandbox
 
+try:
+    import zstandard  # .tar.zst without forking tar/zstd
+except ImportError:
+    zstandard = None
+
 log = get_logger("pyport.extract")
 
 class ExtractError(Exception):
@@ -30,16 +37,33 @@ class ExtractError(Exception):
 # ---------------- Helpers ----------------
 
 def _extract_tar(archive: Path, dest: Path):
-    with tarfile.open(archive, "r:*") as tar:
+    # "r|*": sequential stream, the compressed archive is read exactly once
+    with tarfile.open(archive, "r|*") as tar:
         tar.extractall(dest)
 
 def _extract_zip(archive: Path, dest: Path):
     with zipfile.ZipFile(archive, "r") as z:
         z.extractall(dest)
 
+def _extract_zst(archive: Path, dest: Path):
+    if zstandard is None:
+        # no Python binding: let tar drive zstd
+        subprocess.run(["tar", "--zstd", "-xf", str(archive), "-C", str(dest)], check=True)
+        return
+    with open(archive, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as r:
+        with tarfile.open(fileobj=r, mode="r|") as tar:
+            tar.extractall(dest)
+
 def _extract_xz(archive: Path, dest: Path):
-    # fallback to system xz
-    subprocess.run(["tar", "xf", str(archive), "-C", str(dest)], check=True)
+    # single compressed file (.gz/.xz): a tarball with a short suffix, or one plain file
+    try:
+        _extract_tar(archive, dest)
+        return
+    except tarfile.ReadError:
+        pass
+    opener = gzip.open if archive.name.endswith(".gz") else lzma.open
+    with opener(archive, "rb") as src, open(dest / archive.stem, "wb") as out:
+        shutil.copyfileobj(src, out, 1 << 20)
 
 def _detect_format(archive: Path) -> str:
     name = archive.name
@@ -49,6 +73,8 @@ def _detect_format(archive: Path) -> str:
         return "tar.xz"
     elif name.endswith((".tar.bz2", ".tbz2")):
         return "tar.bz2"
+    elif name.endswith((".tar.zst", ".tzst")):
+        return "tar.zst"
     elif name.endswith(".zip"):
         return "zip"
     elif name.endswith(".gz"):
@@ -94,7 +120,9 @@ def extract_sources(
             if sandbox:
                 sandbox.run(f"tar xf {archive} -C {build_dir}")
             else:
-                if fmt.startswith("tar"):
+                if fmt == "tar.zst":
+                    _extract_zst(archive, build_dir)
+                elif fmt.startswith("tar"):
                     _extract_tar(archive, build_dir)
                 elif fmt == "zip":
                     _extract_zip(archive, build_dir)
@@ -120,9 +148,8 @@ def _cli():
     args = parser.parse_args()
 
     try:
-        with open(args.portfile, "r", encoding="utf-8") as f:
-            port = yaml.safe_load(f) or {}
-            port["path"] = str(Path(args.portfile).parent)
+        port = yaml.load(Path(args.portfile).read_bytes(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+        port["path"] = str(Path(args.portfile).parent)
     except Exception as e:
         log.error(f"Erro ao carregar Portfile: {e}")
         sys.exit(1)
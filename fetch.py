@@ -18,6 +18,7 @@ import subprocess
 import shlex
 import urllib.request
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
@@ -29,6 +30,9 @@ log = get_logger("pyport.fetch")
 class FetchError(Exception):
     """Raised when a fetch fails"""
 
+# Parallel downloads per port
+_MAX_FETCH_WORKERS = 8
+
 # ---------------- Helpers ----------------
 
 def _sha256sum(path: Path) -> str:
@@ -63,6 +67,54 @@ def _git_clone(repo: str, dest: Path, branch: Optional[str] = None, tag: Optiona
 
 # ---------------- Public API ----------------
 
+def _fetch_one(src: Dict[str, Any], distfiles_dir: Path) -> Optional[Path]:
+    """Fetch a single source entry; returns its local path (None if unknown)"""
+    if "url" in src:  # HTTP/FTP
+        url = src["url"]
+        filename = src.get("filename") or url.split("/")[-1]
+        dest = distfiles_dir / filename
+        verified = False
+
+        if dest.exists():
+            log.info(f"Usando cache para {filename}")
+            if "sha256" in src:
+                if _sha256sum(dest) != src["sha256"]:
+                    log.warning(f"Checksum inválido para {filename}, rebaixando...")
+                    dest.unlink()
+                    _download_file(url, dest)
+                else:
+                    verified = True
+            else:
+                log.debug(f"Sem checksum definido para {filename}")
+        else:
+            _download_file(url, dest)
+
+        if "sha256" in src and not verified:
+            checksum = _sha256sum(dest)
+            if checksum != src["sha256"]:
+                raise FetchError(f"Checksum incorreto para {filename}: {checksum}")
+        if "sha256" in src:
+            log.info(f"Checksum OK para {filename}")
+        return dest
+
+    if "git" in src:  # Git
+        repo = src["git"]
+        gitdir = distfiles_dir / (src.get("name") or Path(repo).stem)
+        if gitdir.exists():
+            log.info(f"Repositório já existe: {gitdir}, atualizando...")
+            subprocess.run(["git", "fetch", "--all"], cwd=gitdir, check=True)
+        else:
+            _git_clone(
+                repo, gitdir,
+                branch=src.get("branch"),
+                tag=src.get("tag"),
+                commit=src.get("commit")
+            )
+        return gitdir
+
+    log.warning(f"Fonte desconhecida: {src}")
+    return None
+
 def fetch_sources(port: Dict[str, Any]) -> List[Path]:
     """
     Fetch all sources for a port.
@@ -75,54 +127,17 @@ def fetch_sources(port: Dict[str, Any]) -> List[Path]:
     sources = port.get("source", [])
     if not isinstance(sources, list):
         sources = [sources]
+    if not sources:
+        return []
 
-    results = []
-
-    for src in sources:
-        if "url" in src:  # HTTP/FTP
-            url = src["url"]
-            filename = src.get("filename") or url.split("/")[-1]
-            dest = distfiles_dir / filename
-
-            if dest.exists():
-                log.info(f"Usando cache para {filename}")
-                if "sha256" in src:
-                    if _sha256sum(dest) != src["sha256"]:
-                        log.warning(f"Checksum inválido para {filename}, rebaixando...")
-                        dest.unlink()
-                        _download_file(url, dest)
-                else:
-                    log.debug(f"Sem checksum definido para {filename}")
-            else:
-                _download_file(url, dest)
-
-            if "sha256" in src:
-                checksum = _sha256sum(dest)
-                if checksum != src["sha256"]:
-                    raise FetchError(f"Checksum incorreto para {filename}: {checksum}")
-                log.info(f"Checksum OK para {filename}")
-
-            results.append(dest)
-
-        elif "git" in src:  # Git
-            repo = src["git"]
-            gitdir = distfiles_dir / (src.get("name") or Path(repo).stem)
-            if gitdir.exists():
-                log.info(f"Repositório já existe: {gitdir}, atualizando...")
-                subprocess.run(["git", "fetch", "--all"], cwd=gitdir, check=True)
-            else:
-                _git_clone(
-                    repo, gitdir,
-                    branch=src.get("branch"),
-                    tag=src.get("tag"),
-                    commit=src.get("commit")
-                )
-            results.append(gitdir)
-
-        else:
-            log.warning(f"Fonte desconhecida: {src}")
+    # Sources are independent: download/clone them concurrently (order preserved)
+    if len(sources) == 1:
+        fetched = [_fetch_one(sources[0], distfiles_dir)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(_MAX_FETCH_WORKERS, len(sources))) as ex:
+            fetched = list(ex.map(lambda src: _fetch_one(src, distfiles_dir), sources))
 
-    return results
+    return [p for p in fetched if p is not None]
 
 # ---------------- CLI (debug) ----------------
 
@@ -134,9 +149,8 @@ def _cli():
     args = parser.parse_args()
 
     try:
-        with open(args.portfile, "r", encoding="utf-8") as f:
-            port = yaml.safe_load(f) or {}
-            port["path"] = str(Path(args.portfile).parent)
+        port = yaml.load(Path(args.portfile).read_bytes(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+        port["path"] = str(Path(args.portfile).parent)
     except Exception as e:
         log.error(f"Erro ao carregar Portfile: {e}")
         sys.exit(1)
@@ -19,8 +19,10 @@ Features:
 import subprocess
 import shlex
 import signal
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from pyport.logger import get_logger
 from pyport.config import get_config
@@ -49,6 +51,22 @@ def _run_shell(cmd: str, cwd: Path, timeout: int = 600) -> str:
     except subprocess.TimeoutExpired:
         raise HookError(f"Hook expirou: {cmd}")
 
+@lru_cache(maxsize=256)
+def _hook_scripts_cached(hooks_dir: str, mtime_ns: int) -> Tuple[str, ...]:
+    try:
+        with os.scandir(hooks_dir) as it:
+            return tuple(e.name for e in it if e.is_file())
+    except OSError:
+        return ()
+
+def _hook_scripts(hooks_dir: Path) -> Tuple[str, ...]:
+    """Script names in hooks/ (one scandir per directory, refreshed when its mtime changes)"""
+    try:
+        mtime_ns = os.stat(hooks_dir).st_mtime_ns
+    except OSError:
+        return ()
+    return _hook_scripts_cached(str(hooks_dir), mtime_ns)
+
 # ---------------- Public API ----------------
 
 def run_hook(
@@ -63,23 +81,20 @@ def run_hook(
     - port: port metadata (from Portfile.yaml)
     - sandbox: sandbox instance (if provided, run inside it)
     """
-    cfg = get_config()
     portname = port.get("name", "unknown")
     hooks_dir = Path(port.get("path", ".")) / "hooks"
 
     # Priority: inline in Portfile.yaml > script in hooks/ > none
-    inline_hooks = port.get("hooks", {})
+    inline_hooks = port.get("hooks") or {}
     cmd = inline_hooks.get(hook)
 
     if not cmd:
         # Look for script file
-        candidate = hooks_dir / f"{hook}.sh"
-        if candidate.exists():
-            cmd = f"sh {candidate}"
-        else:
-            candidate = hooks_dir / f"{hook}.py"
-            if candidate.exists():
-                cmd = f"python3 {candidate}"
+        scripts = _hook_scripts(hooks_dir)
+        if f"{hook}.sh" in scripts:
+            cmd = f"sh {hooks_dir / f'{hook}.sh'}"
+        elif f"{hook}.py" in scripts:
+            cmd = f"python3 {hooks_dir / f'{hook}.py'}"
 
     if not cmd:
         log.debug(f"[{portname}] Nenhum hook '{hook}' definido")
@@ -117,8 +132,7 @@ def _cli():
 
     port = {}
     try:
-        with open(args.portfile, "r", encoding="utf-8") as f:
-            port = yaml.safe_load(f) or {}
+        port = yaml.load(Path(args.portfile).read_bytes(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
     except Exception as e:
         log.error(f"Erro ao carregar Portfile: {e}")
         sys.exit(1)
@@ -13,8 +13,11 @@ import sys, json
 from pathlib import Path
 from typing import Dict, Any
 
-import yaml
 from dependency import DependencyGraph
+try:
+    from pyport.portindex import scan_ports, load_full
+except ImportError:  # executado direto da árvore, fora do pacote
+    from portindex import scan_ports, load_full
 
 PORTFILES_ROOT = Path("/usr/ports")
 METADATA_ROOT = Path("/pyport/metadata")
@@ -30,14 +33,14 @@ def log(msg: str):
 
 
 def load_portfile(pkg: str) -> Dict[str, Any]:
-    for portfile in PORTFILES_ROOT.glob(f"**/Portfile.yaml"):
-        try:
-            with open(portfile) as f:
-                data = yaml.safe_load(f)
-                if data.get("name") == pkg:
-                    return data
-        except Exception as e:
-            log(f"erro lendo {portfile}: {e}")
+    # localiza pelo índice de ports; só o Portfile encontrado é lido por inteiro
+    index = scan_ports(PORTFILES_ROOT, on_error=lambda pf, e: log(f"erro lendo {pf}: {e}"))
+    for path, summary in index.items():
+        if summary.get("name") == pkg:
+            try:
+                return load_full(Path(path)) or {}
+            except Exception as e:
+                log(f"erro lendo {path}: {e}")
     return {}
 
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+installdb.py - Banco de pacotes instalados do PyPort
+
+SQLite em modo WAL (<db_dir>/installed.sqlite) no lugar de reescrever o
+installed.json inteiro a cada alteração:
+ - consulta/atualização de um pacote é uma operação de índice (O(1) em vez de O(N))
+ - leitores concorrentes não bloqueiam durante builds paralelos
+ - importação única do installed.json legado (e do journal installed.jsonl) na
+   primeira abertura; os arquivos legados são renomeados para *.migrated, de modo
+   que nenhum leitor/escritor antigo continue usando um DB paralelo
+"""
+
+from __future__ import annotations
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Set, Tuple
+
+from pyport.logger import get_logger
+
+LOG = get_logger("pyport.installdb")
+
+# PRAGMA user_version: 1 = tabela criada e JSON legado já importado
+_SCHEMA_VERSION = 1
+
+
+class InstalledDB:
+    """
+    Pacotes instalados: nome -> dict (version, pkg, files, ...).
+    """
+
+    def __init__(self, db_dir: Path):
+        self.db_dir = Path(db_dir)
+        self.path = self.db_dir / "installed.sqlite"
+        self.legacy_json = self.db_dir / "installed.json"
+        self.legacy_journal = self.db_dir / "installed.jsonl"
+        self.db_dir.mkdir(parents=True, exist_ok=True)
+        # uma conexão por processo, compartilhada entre threads sob _lock
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] >= _SCHEMA_VERSION:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # outro processo pode ter migrado enquanto esperávamos o lock
+                if self._conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                    self._conn.execute(
+                        "CREATE TABLE IF NOT EXISTS installed ("
+                        " name TEXT PRIMARY KEY, version TEXT, data TEXT NOT NULL)")
+                    imported = self._import_legacy()
+                    self._conn.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+                    if imported:
+                        LOG.info(f"{imported} pacotes importados de {self.legacy_json}")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._retire_legacy()
+
+    def _retire_legacy(self):
+        for p in (self.legacy_json, self.legacy_journal):
+            try:
+                os.replace(p, p.with_name(p.name + ".migrated"))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                LOG.warning(f"Não foi possível renomear {p}: {e}")
+
+    def _import_legacy(self) -> int:
+        legacy: Dict[str, Any] = {}
+        try:
+            data = json.loads(self.legacy_json.read_text(encoding="utf-8"))
+            if isinstance(data, dict):
+                legacy.update(data)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOG.warning(f"Erro lendo DB legado {self.legacy_json}: {e}")
+        # journal do build.py antigo por cima do snapshot (o registro mais recente vence)
+        try:
+            with open(self.legacy_journal, "rb") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        legacy[rec["name"]] = rec["entry"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # linha parcial de um append interrompido
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            LOG.warning(f"Erro lendo journal legado {self.legacy_journal}: {e}")
+        if not legacy:
+            return 0
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO installed(name, version, data) VALUES (?, ?, ?)",
+            [self._row(n, e) for n, e in legacy.items()])
+        return len(legacy)
+
+    @staticmethod
+    def _row(name: str, entry: Dict[str, Any]) -> Tuple[str, Optional[str], str]:
+        version = entry.get("version") if isinstance(entry, dict) else None
+        return name, (str(version) if version is not None else None), json.dumps(entry)
+
+    def contains(self, name: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM installed WHERE name=?", (name,)).fetchone() is not None
+
+    def names(self) -> Set[str]:
+        """Nomes instalados (para testar várias dependências com uma única consulta)."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT name FROM installed")}
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM installed WHERE name=?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, name: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO installed(name, version, data) VALUES (?, ?, ?)",
+                               self._row(name, entry))
+
+    def delete(self, name: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM installed WHERE name=?", (name,))
+
+    def all(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, data FROM installed ORDER BY name").fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def replace_all(self, db: Dict[str, Any]):
+        """Substitui o conteúdo inteiro (compatibilidade com save_installed/save_db)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM installed")
+                self._conn.executemany("INSERT INTO installed(name, version, data) VALUES (?, ?, ?)",
+                                       [self._row(n, e) for n, e in db.items()])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+# uma instância por diretório e processo (conexões sqlite não atravessam fork)
+_DBS: Dict[Tuple[str, int], InstalledDB] = {}
+_DBS_LOCK = threading.Lock()
+
+
+def open_installed_db(db_dir: Path) -> InstalledDB:
+    key = (str(db_dir), os.getpid())
+    with _DBS_LOCK:
+        db = _DBS.get(key)
+        if db is None:
+            db = _DBS[key] = InstalledDB(db_dir)
+        return db
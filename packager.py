@@ -40,18 +40,16 @@ def create_tar_zst(source_dir: Path, output_path: Path) -> Path:
     Cria pacote .tar.zst a partir de source_dir.
     """
     if zstd:
-        # usar biblioteca Python
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_tar:
-            with tarfile.open(tmp_tar.name, "w") as tf:
+        # usar biblioteca Python: tar escrito direto no compressor (sem tar temporário
+        # nem o arquivo inteiro em memória), compressão em todas as CPUs
+        cctx = zstd.ZstdCompressor(level=19, threads=-1)
+        with open(output_path, "wb") as fout, cctx.stream_writer(fout) as zout:
+            with tarfile.open(fileobj=zout, mode="w|") as tf:
                 tf.add(source_dir, arcname=".")
-            with open(tmp_tar.name, "rb") as fin, open(output_path, "wb") as fout:
-                cctx = zstd.ZstdCompressor(level=19)
-                fout.write(cctx.compress(fin.read()))
-        os.unlink(tmp_tar.name)
     else:
-        # fallback para o zstd externo
-        run_cmd(["tar", "-cf", "-", "-C", str(source_dir), ".",
-                 "|", "zstd", "-19", "-o", str(output_path)], check=True, shell=True)
+        # fallback para o zstd externo: argv direto (sem /bin/sh), zstd multithread
+        run_cmd(["tar", "--use-compress-program=zstd -19 -T0", "-cf", str(output_path),
+                 "-C", str(source_dir), "."], check=True)
     return output_path
 
 
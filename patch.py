@@ -112,9 +112,8 @@ def _cli():
 
     port = {}
     try:
-        with open(args.portfile, "r", encoding="utf-8") as f:
-            port = yaml.safe_load(f) or {}
-            port["path"] = str(Path(args.portfile).parent)
+        port = yaml.load(Path(args.portfile).read_bytes(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+        port["path"] = str(Path(args.portfile).parent)
     except Exception as e:
         log.error(f"Erro ao carregar Portfile: {e}")
         sys.exit(1)
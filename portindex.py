@@ -0,0 +1,105 @@
+"""
+pyport portindex module
+
+Índice persistente dos Portfiles da árvore de ports:
+- Varredura com os.scandir, sem descer abaixo de diretórios que já têm Portfile.yaml
+- Resumo (name, version, description, category) por Portfile, salvo em
+  /pyport/cache/port_index.json e validado por (mtime_ns, tamanho) de cada arquivo
+- Só os Portfiles novos ou alterados são parseados novamente
+"""
+
+import os, json
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, Optional
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+PORT_INDEX_FILE = Path("/pyport/cache/port_index.json")
+PORTFILE_NAME = "Portfile.yaml"
+SUMMARY_FIELDS = ("name", "version", "description", "category")
+
+# (raiz, entradas) já carregados neste processo
+_loaded: Dict[str, Dict[str, Any]] = {}
+
+
+def iter_portfiles(root: Path) -> Iterator[os.DirEntry]:
+    """
+    Percorre a árvore e produz a entrada de cada Portfile.yaml.
+    Diretórios com Portfile.yaml não são descidos (patches/, files/ etc.),
+    nem diretórios ocultos.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        pf = next((e for e in entries if e.name == PORTFILE_NAME and e.is_file()), None)
+        if pf is not None:
+            yield pf
+            continue
+        # .git/.svn etc. nunca contêm ports
+        stack.extend(e.path for e in entries if e.is_dir(follow_symlinks=False) and not e.name.startswith("."))
+
+
+def _read_index(root: Path) -> Dict[str, Any]:
+    key = str(root)
+    if key not in _loaded:
+        try:
+            data = json.loads(PORT_INDEX_FILE.read_bytes())
+            _loaded[key] = data["entries"] if data.get("root") == key else {}
+        except Exception:
+            _loaded[key] = {}
+    return _loaded[key]
+
+
+def _write_index(root: Path, entries: Dict[str, Any]):
+    try:
+        PORT_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = PORT_INDEX_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"root": str(root), "entries": entries}, default=str))
+        os.replace(tmp, PORT_INDEX_FILE)
+    except OSError:
+        pass  # índice é só cache
+
+
+def load_full(portfile: Path) -> Dict[str, Any]:
+    # um único buffer: o scanner do libyaml não passa pelo leitor em blocos
+    return yaml.load(portfile.read_bytes(), Loader=_YamlLoader)
+
+
+def scan_ports(root: Path, on_error: Optional[Callable[[Path, Exception], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna {caminho do Portfile: resumo} para toda a árvore.
+    Portfiles vazios ou com erro de leitura ficam de fora (e não são cacheados).
+    """
+    cached = _read_index(root)
+    entries: Dict[str, Any] = {}
+    changed = False
+    for e in iter_portfiles(root):
+        st = e.stat()
+        stamp = [st.st_mtime_ns, st.st_size]
+        hit = cached.get(e.path)
+        if hit and hit[0] == stamp:
+            entries[e.path] = hit
+            continue
+        try:
+            meta = load_full(Path(e.path))
+        except Exception as exc:
+            if on_error:
+                on_error(Path(e.path), exc)
+            continue
+        if not isinstance(meta, dict) or not meta:
+            continue
+        entries[e.path] = [stamp, {k: meta[k] for k in SUMMARY_FIELDS if k in meta}]
+        changed = True
+    if changed or len(entries) != len(cached):
+        _loaded[str(root)] = entries
+        _write_index(root, entries)
+    return {path: summary for path, (_, summary) in entries.items()}
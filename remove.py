@@ -26,6 +26,7 @@ from pyport.hooks import run_hook
 from pyport.dependency import DependencyGraph
 from pyport.config import get_config
 from pyport.sandbox import Sandbox
+from pyport.installdb import open_installed_db
 
 log = get_logger("pyport.remove")
 
@@ -40,16 +41,19 @@ class RemoveError(Exception):
 
 # ---------------- Utilities ----------------
 
+def _db():
+    # SQLite em DB_FILE.parent; o installed.json legado é importado na primeira abertura
+    return open_installed_db(DB_FILE.parent)
+
 def load_db() -> Dict[str, Any]:
-    if DB_FILE.exists():
-        try:
-            return json.loads(DB_FILE.read_text(encoding="utf-8"))
-        except Exception as e:
-            log.error(f"Erro lendo DB instalado: {e}")
+    try:
+        return _db().all()
+    except Exception as e:
+        log.error(f"Erro lendo DB instalado: {e}")
     return {}
 
 def save_db(db: Dict[str, Any]):
-    DB_FILE.write_text(json.dumps(db, indent=2), encoding="utf-8")
+    _db().replace_all(db)
 
 def write_history(entry: Dict[str, Any]):
     arr = []
@@ -122,9 +126,9 @@ def remove_package(
     sandbox: Optional[Sandbox] = None
 ) -> Dict[str, Any]:
     cfg = get_config()
-    db = load_db()
+    entry = _db().get(pkgname)
 
-    if pkgname not in db:
+    if entry is None:
         log.error(f"Pacote '{pkgname}' não instalado.")
         return {"status": "error", "message": "not installed", "package": pkgname}
 
@@ -141,7 +145,7 @@ def remove_package(
         else:
             log.info("Forçando remoção ignorando dependências reversas.")
 
-    files = db[pkgname].get("files", [])
+    files = entry.get("files", [])
 
     if not files:
         log.warning(f"Nenhum arquivo registrado para {pkgname}.")
@@ -181,8 +185,7 @@ def remove_package(
     run_hook({"name": pkgname}, "post_remove", sandbox_dirArg(sandbox), sandbox)
 
     # update DB
-    del db[pkgname]
-    save_db(db)
+    _db().delete(pkgname)
 
     cleanup_empty_dirs(removed)
 
@@ -23,6 +23,7 @@ Funcionalidades principais (resumo):
 
 from __future__ import annotations
 import os
+import re
 import sys
 import shutil
 import subprocess
@@ -33,8 +34,12 @@ import json
 import time
 import datetime
 import socket
+import atexit
+import tempfile
+import threading
+from collections import ChainMap
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import IO, Dict, Any, List, Optional, Tuple, Union
 
 # import Fakerunner from your fakeroot module (expected path pyport_fakeroot.py)
 try:
@@ -47,29 +52,33 @@ except Exception:
         Fakerunner = None  # will check later
 
 # YAML loader: prefer PyYAML if available
+# (accepts text, bytes or a binary stream; libyaml's CSafeLoader when available)
 try:
     import yaml  # type: ignore
-    _yaml_load = lambda s: yaml.safe_load(s)
+    _YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    _yaml_load = lambda s: yaml.load(s, Loader=_YamlLoader)
 except Exception:
-    def _yaml_load(s: str) -> Dict[str, Any]:
+    # minimal fallback: one regex pass over the whole text instead of per-line Python work
+    # ("- item" lines, "key: value" lines; comments and anything else are skipped)
+    _YAML_LITE_RE = re.compile(
+        r"^[ \t]*(?:- [ \t]*(?P<item>[^\n]*[^\s])|(?P<key>[^\s#:][^\n:]*|):(?P<val>[^\n]*))", re.M)
+
+    def _yaml_load(s: Any) -> Dict[str, Any]:
+        if hasattr(s, "read"):
+            s = s.read()
+        if isinstance(s, bytes):
+            s = s.decode("utf-8")
         data: Dict[str, Any] = {}
         cur = None
-        for raw in s.splitlines():
-            line = raw.rstrip()
-            if not line or line.strip().startswith("#"):
-                continue
-            if line.lstrip().startswith("- "):
+        for m in _YAML_LITE_RE.finditer(s):
+            item = m.group("item")
+            if item is not None:
                 if cur:
-                    data.setdefault(cur, []).append(line.lstrip()[2:].strip())
-            elif ":" in line:
-                k, v = line.split(":", 1)
-                k = k.strip()
-                v = v.strip()
-                cur = k
-                if v == "":
-                    data[k] = []
-                else:
-                    data[k] = v
+                    data.setdefault(cur, []).append(item)
+                continue
+            cur = m.group("key").strip()
+            v = m.group("val").strip()
+            data[cur] = v if v else []
         return data
 
 # ---------------------------
@@ -100,38 +109,75 @@ _COL_YELLOW = "\033[33m"
 # Utilities
 # ---------------------------
 
-def get_config() -> Dict[str, Any]:
-    cfg = dict(DEFAULT_CONFIG)
+def get_config() -> ChainMap:
+    # layered view: user > system > DEFAULT_CONFIG (defaults are shared, not copied);
+    # writes land in the top (override) layer
     syscfg = Path("/etc/pyport/config.yaml")
     usercfg = Path.home() / ".config" / "pyport" / "config.yaml"
-    for p in (syscfg, usercfg):
+    layers: List[Dict[str, Any]] = [{}]
+    for p in (usercfg, syscfg):
         try:
-            if p.exists():
-                with open(p, "r", encoding="utf-8") as f:
-                    data = _yaml_load(f.read())
-                    if isinstance(data, dict):
-                        cfg.update(data)
-        except Exception:
+            with open(p, "rb") as f:
+                data = _yaml_load(f)
+                if isinstance(data, dict):
+                    layers.append(data)
+        except Exception:  # includes FileNotFoundError: no stat beforehand
             continue
+    cfg = ChainMap(*layers, DEFAULT_CONFIG)
     # ensure folders exist
     for d in (cfg["build_root"], cfg["log_dir"], cfg["distfiles_cache"], cfg["toolchain_dir"]):
         try:
-            Path(d).mkdir(parents=True, exist_ok=True)
+            ensure_dir(d)
         except Exception:
             pass
     return cfg
 
+# long-lived directories already known to exist in this process
+_mkdir_seen: set = set()
+
+def ensure_dir(p: Union[str, Path]) -> None:
+    """mkdir -p for long-lived dirs (config/log/cache), at most once per process.
+    Not for build dirs that may be removed and recreated during a run."""
+    s = str(p)
+    if s in _mkdir_seen:
+        return
+    os.makedirs(s, exist_ok=True)
+    _mkdir_seen.add(s)
+
 def log_path(cfg: Dict[str, Any], name: str) -> Path:
     p = Path(cfg.get("log_dir")) / f"{name}.log"
-    p.parent.mkdir(parents=True, exist_ok=True)
+    ensure_dir(p.parent)
     return p
 
+# (log_dir, name) -> line-buffered append handle, kept open across _log calls
+_log_fds: Dict[Tuple[Any, str], IO[str]] = {}
+_LOG_FDS_MAX = 64  # oldest handle is closed beyond this (long batch builds)
+# build_one runs in threads (build.py -j): one lock covers lookup, open, eviction and
+# the write, so no handle is opened twice or closed under another thread's write
+_log_fds_lock = threading.Lock()
+
 def _log(cfg: Dict[str, Any], name: str, message: str) -> None:
-    p = log_path(cfg, name)
+    key = (cfg.get("log_dir"), name)
     ts = datetime.datetime.now().isoformat()
-    with open(p, "a", encoding="utf-8") as f:
+    with _log_fds_lock:
+        f = _log_fds.get(key)
+        if f is None:
+            f = open(log_path(cfg, name), "a", encoding="utf-8", buffering=1)
+            if len(_log_fds) >= _LOG_FDS_MAX:
+                _log_fds.pop(next(iter(_log_fds))).close()
+            _log_fds[key] = f
         f.write(f"[{ts}] {message}\n")
 
+@atexit.register
+def _close_logs() -> None:
+    with _log_fds_lock:
+        for f in _log_fds.values():
+            try:
+                f.close()
+            except Exception:
+                pass
+        _log_fds.clear()
+
 def safe_makedirs(p: Union[str, Path]) -> Path:
     p = Path(p)
     p.mkdir(parents=True, exist_ok=True)
@@ -212,7 +258,7 @@ def fetch_from_mirrors(mirrors: List[str], name: str, cfg: Dict[str, Any], check
     name: basename fallback if mirror URLs end with slash
     """
     cache = Path(cfg.get("distfiles_cache"))
-    cache.mkdir(parents=True, exist_ok=True)
+    ensure_dir(cache)
     # try each mirror; use basename from URL if present
     last_err = None
     retries = cfg.get("max_download_retries", 3)
@@ -245,10 +291,13 @@ def fetch_from_mirrors(mirrors: List[str], name: str, cfg: Dict[str, Any], check
 def extract_archive(archive: Path, dest: Path, cfg: Dict[str, Any]) -> None:
     dest.mkdir(parents=True, exist_ok=True)
     try:
-        if tarfile.is_tarfile(str(archive)):
-            with tarfile.open(str(archive)) as t:
+        # single sequential read ("r|*") instead of is_tarfile() + a seeking open()
+        try:
+            with tarfile.open(str(archive), "r|*") as t:
                 t.extractall(path=str(dest))
             return
+        except tarfile.ReadError:
+            pass
         if zipfile.is_zipfile(str(archive)):
             with zipfile.ZipFile(str(archive)) as z:
                 z.extractall(path=str(dest))
@@ -263,6 +312,88 @@ def extract_archive(archive: Path, dest: Path, cfg: Dict[str, Any]) -> None:
     except Exception as e:
         raise RuntimeError(f"Failed to extract {archive}: {e}")
 
+# suffixes build_port extracts (str.endswith takes the tuple directly)
+_ARCHIVE_EXTS = (".tar.gz",".tgz",".tar.bz2",".tar.xz",".tar.zst",".tar",".zip",".7z",".gz",".xz")
+
+# tar flag for each compressed-tarball suffix when reading from a pipe
+_STREAM_TAR_FLAGS = (
+    (".tar.gz", ["-z"]), (".tgz", ["-z"]),
+    (".tar.bz2", ["-j"]),
+    (".tar.xz", ["-J"]),
+    (".tar.zst", ["--use-compress-program=zstd -T0"]),
+    (".tar", []),
+)
+
+def _stream_tar_flags(url: str) -> Optional[List[str]]:
+    for ext, flags in _STREAM_TAR_FLAGS:
+        if url.endswith(ext):
+            return flags
+    return None
+
+def _parse_checksum(checksum_field: Optional[str]) -> Optional[Tuple[str, str]]:
+    if not checksum_field:
+        return None
+    parts = str(checksum_field).split(":",1)
+    if len(parts) == 2:
+        return parts[0].lower(), parts[1].strip().lower()
+    return "sha256", parts[0].strip().lower()
+
+def stream_fetch_extract(url: str, cache_file: Path, dest: Path, checksum: Optional[str], cfg: Dict[str, Any]) -> bool:
+    """
+    Download a tarball with curl and extract it while it downloads:
+    one pass writes the distfiles cache copy, updates the checksum and feeds `tar -x`.
+    Extraction goes to a staging dir that is moved into `dest` only after the
+    checksum matches. Returns False (nothing left behind) when not applicable or
+    on any failure, so the caller can fall back to download-then-extract.
+    """
+    flags = _stream_tar_flags(url)
+    if flags is None or not (shutil.which("curl") and shutil.which("tar")):
+        return False
+    want = _parse_checksum(checksum)
+    if want and want[0] not in ("sha256","sha512","md5"):
+        return False
+    h = hashlib.new(want[0]) if want else None
+
+    ensure_dir(cache_file.parent)
+    dest.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".extract-", dir=str(dest)))
+    part = cache_file.with_name(cache_file.name + ".part")
+    ok = False
+    curl = tar = None
+    try:
+        curl = subprocess.Popen(["curl", "-fsSL", url], stdout=subprocess.PIPE)
+        tar = subprocess.Popen(["tar", "-x"] + flags + ["-f", "-", "-C", str(staging)], stdin=subprocess.PIPE)
+        with open(part, "wb") as out:
+            for chunk in iter(lambda: curl.stdout.read(1 << 20), b""):
+                out.write(chunk)
+                if h:
+                    h.update(chunk)
+                tar.stdin.write(chunk)
+        tar.stdin.close()
+        ok = curl.wait() == 0 and tar.wait() == 0
+        if ok and want and h.hexdigest() != want[1]:
+            _log(cfg, dest.name, f"checksum mismatch for {url}")
+            ok = False
+        if ok:
+            os.replace(part, cache_file)
+            for entry in os.scandir(staging):
+                os.replace(entry.path, dest / entry.name)
+    except (OSError, ValueError) as e:  # BrokenPipe when tar dies early
+        _log(cfg, dest.name, f"streamed fetch failed: {url} -> {e}")
+        ok = False
+    finally:
+        for proc in (curl, tar):
+            if proc is not None and proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        shutil.rmtree(staging, ignore_errors=True)
+        if not ok:
+            try:
+                part.unlink()
+            except FileNotFoundError:
+                pass
+    return ok
+
 # ---------------------------
 # Patches & Hooks (validated)
 # ---------------------------
@@ -296,13 +427,15 @@ def _hooks_env(portdir: Path, build_dir: Path, sandbox_dir: Path, cfg: Dict[str,
 def run_hook_list(hooks: List[str], cwd: Optional[Path], fakerunner: Fakerunner, sandbox_dir: Path, cfg: Dict[str,Any]) -> None:
     if not hooks:
         return
+    # same environment for every command in the list
+    env = _hooks_env(cwd.parent if cwd else Path("."), cwd or Path("."), sandbox_dir, cfg)
     for cmd in hooks:
         if not cmd or not str(cmd).strip():
             _log(cfg, "hooks", f"empty/invalid hook ignored: {cmd}")
             continue
         _log(cfg, "hooks", f"running hook: {cmd}")
         try:
-            fakerunner.run_and_check(cmd, cwd=str(cwd) if cwd else None, env=_hooks_env(cwd.parent if cwd else Path("."), cwd or Path("."), sandbox_dir, cfg), sandbox_dir=str(sandbox_dir), shell=True, stream_output=True)
+            fakerunner.run_and_check(cmd, cwd=str(cwd) if cwd else None, env=env, sandbox_dir=str(sandbox_dir), shell=True, stream_output=True)
         except Exception as e:
             _log(cfg, "hooks", f"hook failed: {cmd} -> {e}")
             raise RuntimeError(f"Hook failed: {cmd} -> {e}")
@@ -361,19 +494,24 @@ _BUILD_HANDLERS = {
 # Source selection heuristics
 # ---------------------------
 
+_SOURCE_INDICATORS = frozenset(("configure","CMakeLists.txt","setup.py","pyproject.toml","Cargo.toml","pom.xml","build.gradle"))
+
 def select_source_tree(build_dir: Path) -> Optional[Path]:
-    entries = [p for p in build_dir.iterdir() if p.name != "sandbox"]
+    with os.scandir(build_dir) as it:
+        entries = [e for e in it if e.name != "sandbox"]
     if not entries:
         return None
-    dirs = [p for p in entries if p.is_dir()]
+    dirs = [e for e in entries if e.is_dir()]
     if len(dirs) == 1:
-        return dirs[0]
-    indicators = ("configure","CMakeLists.txt","setup.py","pyproject.toml","Cargo.toml","pom.xml","build.gradle")
-    for p in entries:
-        if p.is_dir():
-            for ind in indicators:
-                if (p/ind).exists():
-                    return p
+        return Path(dirs[0].path)
+    # one directory read per candidate, indicators tested against the name set
+    for e in dirs:
+        try:
+            with os.scandir(e.path) as it:
+                if any(c.name in _SOURCE_INDICATORS for c in it):
+                    return Path(e.path)
+        except OSError:
+            continue
     return build_dir
 
 # ---------------------------
@@ -506,6 +644,24 @@ def create_build_tree(cfg: Dict[str,Any], meta: Dict[str,Any]) -> Tuple[Path,Pat
 # High-level build_port
 # ---------------------------
 
+def _find_portfile(portsdir: Path, target: str) -> Optional[Path]:
+    """
+    Locate <category>/<target>/portfile.yaml with a two-level scandir (the usual
+    tree layout); deeper layouts fall back to the recursive glob.
+    """
+    try:
+        with os.scandir(portsdir) as it:
+            cats = sorted((e.path for e in it if e.is_dir() and not e.name.startswith(".")))
+    except OSError:
+        return None
+    for cat in cats:
+        pf = Path(cat) / target / "portfile.yaml"
+        if pf.is_file():
+            return pf
+    for pf in portsdir.glob("**/" + target + "/portfile.yaml"):
+        return pf
+    return None
+
 def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str,Any]:
     """
     target: category/name or name
@@ -524,14 +680,13 @@ def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str
     if "/" in target:
         pf = portsdir / target / "portfile.yaml"
     else:
-        matches = list(portsdir.glob("**/" + target + "/portfile.yaml"))
-        pf = Path(matches[0]) if matches else None
+        pf = _find_portfile(portsdir, target)
     if not pf or not pf.exists():
         return {"status":"error","message":f"portfile for {target} not found", "target":target}
 
     portdir = pf.parent
     try:
-        meta = _yaml_load(pf.read_text(encoding="utf-8")) or {}
+        meta = _yaml_load(pf.read_bytes()) or {}
     except Exception as e:
         return {"status":"error","message":f"failed parse portfile: {e}"}
 
@@ -598,6 +753,21 @@ def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str
             else:
                 continue
 
+            # tarball not cached yet: download and extract in a single pass
+            cache_dir = Path(cfg.get("distfiles_cache"))
+            streamed = False
+            for u in (u for u in urls if u):
+                fname = u.rstrip("/").split("/")[-1] or destname or name
+                if (cache_dir / fname).exists() or _stream_tar_flags(u) is None:
+                    break
+                _log(cfg, logname, f"streaming {u} into {src_cache}")
+                if stream_fetch_extract(u, cache_dir / fname, src_cache, checksum, cfg):
+                    streamed = True
+                    break
+            if streamed:
+                fetched_paths.append(src_cache)
+                continue
+
             # attempt mirrors order; store in cache dir
             try:
                 fp = fetch_from_mirrors([u for u in urls if u], destname or name, cfg, checksum=checksum)
@@ -607,7 +777,7 @@ def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str
             # extract if archive
             try:
                 # if file is archive extract into src_cache
-                if any(str(fp).endswith(ext) for ext in (".tar.gz",".tgz",".tar.bz2",".tar.xz",".tar",".zip",".7z",".gz",".xz")):
+                if fp.name.endswith(_ARCHIVE_EXTS):
                     _log(cfg, logname, f"extracting {fp} to {src_cache}")
                     extract_archive(fp, src_cache, cfg)
                     fetched_paths.append(src_cache)
@@ -644,9 +814,13 @@ def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str
         _log(cfg, logname, "no source tree found")
         return {"status":"error","message":"no source tree found", "log":str(logp)}
 
+    # resolve hooks mapping and sandbox path once for every stage
+    hooks = meta.get("hooks") or {}
+    sandbox_path = Path(sandbox_dir)
+
     # run pre_configure hooks
     try:
-        run_hook_list(meta.get("hooks", {}).get("pre_configure", []), source_root, fr, Path(sandbox_dir), cfg)
+        run_hook_list(hooks.get("pre_configure", []), source_root, fr, sandbox_path, cfg)
     except Exception as e:
         _log(cfg, logname, f"pre_configure failed: {e}")
         if not (cfg.get("keep_build_on_success") or keep_build):
@@ -678,7 +852,7 @@ def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str
 
     # post_configure hooks
     try:
-        run_hook_list(meta.get("hooks", {}).get("post_configure", []), source_root, fr, Path(sandbox_dir), cfg)
+        run_hook_list(hooks.get("post_configure", []), source_root, fr, sandbox_path, cfg)
     except Exception as e:
         _log(cfg, logname, f"post_configure failed: {e}")
         # non-fatal? treat as failure
@@ -686,14 +860,14 @@ def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str
 
     # checks
     try:
-        run_hook_list(meta.get("hooks", {}).get("check", []), source_root, fr, Path(sandbox_dir), cfg)
+        run_hook_list(hooks.get("check", []), source_root, fr, sandbox_path, cfg)
     except Exception as e:
         _log(cfg, logname, f"check hook failed: {e}")
         # record warning, continue
 
     # pre_install hooks
     try:
-        run_hook_list(meta.get("hooks", {}).get("pre_install", []), source_root, fr, Path(sandbox_dir), cfg)
+        run_hook_list(hooks.get("pre_install", []), source_root, fr, sandbox_path, cfg)
     except Exception as e:
         _log(cfg, logname, f"pre_install hook failed: {e}")
         return {"status":"error","message":f"pre_install failed: {e}", "log":str(logp)}
@@ -709,7 +883,7 @@ def build_port(target: str, options: Optional[Dict[str,Any]] = None) -> Dict[str
 
     # post_install hooks
     try:
-        run_hook_list(meta.get("hooks", {}).get("post_install", []), source_root, fr, Path(sandbox_dir), cfg)
+        run_hook_list(hooks.get("post_install", []), source_root, fr, sandbox_path, cfg)
     except Exception as e:
         _log(cfg, logname, f"post_install failed: {e}")
         return {"status":"error","message":f"post_install failed: {e}", "log":str(logp)}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sandbox_pool.py - Pool de sandboxes pré-preparados do PyPort
+
+Mantém até `size` sandboxes já preparados (prepare()) por uma thread em
+segundo plano, para que o build de um port não espere pela criação do
+sandbox. Um sandbox entregue por acquire() é usado uma única vez:
+release() o destrói e a thread prepara um substituto.
+`jobs` limita quantos sandboxes a thread prepara no total (um build de CLI
+pede 1: nada é preparado à toa); get_pool() soma os jobs de chamadas seguintes.
+Com size=0 não há thread nem sandboxes antecipados: acquire() prepara na hora
+(workers do ProcessPoolExecutor de Core._build_waves, que constroem um único port).
+"""
+
+from __future__ import annotations
+import os
+import queue
+import atexit
+import threading
+import itertools
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from pyport.logger import get_logger
+from pyport.sandbox import Sandbox
+
+LOG = get_logger("pyport.sandbox_pool")
+
+
+class SandboxPool:
+    """
+    Pool de sandboxes prontos sob `root`.
+    """
+
+    def __init__(self, root: Path, size: int = 4, jobs: Optional[int] = None):
+        self.root = Path(root)
+        self.size = max(0, size if jobs is None else min(size, jobs))
+        self._q: "queue.Queue[Sandbox]" = queue.Queue()
+        self._slots = threading.Semaphore(self.size)
+        self._seq = itertools.count()
+        self._left = jobs  # sandboxes que a thread ainda pode preparar (None: sem limite)
+        self._lock = threading.Lock()
+        self._broken = False
+        self._closed = False
+        self._thread = None
+        self._start()
+
+    def _start(self):
+        if self.size and (self._left is None or self._left > 0):
+            self._thread = threading.Thread(target=self._refill, name="sandbox-pool", daemon=True)
+            self._thread.start()
+
+    def add_jobs(self, jobs: int):
+        """Amplia o limite de um pool com `jobs` (chamado por get_pool)."""
+        with self._lock:
+            if self._left is None or self._closed or self._broken:
+                return
+            self._left += jobs
+            if self._thread is None:
+                self._start()
+
+    def _new_sandbox(self) -> Sandbox:
+        path = self.root / f"pool-{os.getpid()}-{next(self._seq)}"
+        sb = Sandbox(str(path), force_clean=True)
+        sb.prepare()
+        return sb
+
+    def _refill(self):
+        while not self._closed:
+            self._slots.acquire()
+            with self._lock:
+                if self._closed or self._left == 0:
+                    self._slots.release()  # devolve o slot: add_jobs() reinicia a thread
+                    if not self._closed:
+                        self._thread = None
+                    break
+                if self._left is not None:
+                    self._left -= 1
+            try:
+                self._q.put(self._new_sandbox())
+            except Exception as e:
+                # sem retry em laço: acquire() passa a preparar de forma síncrona
+                LOG.warning(f"Pool de sandbox desativado: {e}")
+                self._broken = True
+                self._slots.release()
+                return
+
+    def acquire(self) -> Sandbox:
+        """Retorna um sandbox preparado (prepara na hora se o pool estiver vazio)."""
+        try:
+            sb = self._q.get_nowait()
+        except queue.Empty:
+            return self._new_sandbox()
+        self._slots.release()  # a thread já pode preparar o próximo
+        return sb
+
+    def release(self, sb: Sandbox, clean: bool = True):
+        """Destrói um sandbox obtido com acquire()."""
+        try:
+            sb.destroy(clean=clean)
+        except Exception as e:
+            LOG.warning(f"Erro destruindo sandbox {getattr(sb, 'path', sb)}: {e}")
+
+    def close(self):
+        self._closed = True
+        thread = self._thread
+        if thread is not None:
+            self._slots.release()  # acorda a thread de refill
+            # um _new_sandbox() em andamento ainda pode entrar na fila: espera antes de esvaziá-la
+            thread.join()
+        while True:
+            try:
+                sb = self._q.get_nowait()
+            except queue.Empty:
+                break
+            self.release(sb)
+
+
+# um pool por processo e diretório raiz
+_POOLS: Dict[Tuple[str, int], SandboxPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(root: Path, size: int = 4, jobs: Optional[int] = None) -> SandboxPool:
+    key = (str(root), os.getpid())
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = SandboxPool(root, size, jobs)
+        elif jobs:
+            pool.add_jobs(jobs)
+        return pool
+
+
+@atexit.register
+def _close_pools():
+    pid = os.getpid()
+    for (_, owner), pool in list(_POOLS.items()):
+        if owner == pid:
+            pool.close()
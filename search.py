@@ -14,6 +14,15 @@ from pathlib import Path
 from typing import Dict, Any, List
 
 import yaml
+try:
+    from pyport.portindex import scan_ports
+except ImportError:  # executado direto da árvore, fora do pacote
+    from portindex import scan_ports
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 PORTFILES_ROOT = Path("/usr/ports")
 LOG_DIR = Path("/pyport/logs")
@@ -29,8 +38,7 @@ def log(msg: str):
 
 def load_portfile(portfile: Path) -> Dict[str, Any]:
     try:
-        with open(portfile) as f:
-            return yaml.safe_load(f)
+        return yaml.load(Path(portfile).read_bytes(), Loader=_YamlLoader)
     except Exception as e:
         log(f"erro ao ler {portfile}: {e}")
         return {}
@@ -47,10 +55,10 @@ def search_ports(query: str, by_description: bool = False,
                  category: str = None, min_version: str = None,
                  max_version: str = None, output_json: bool = False) -> List[Dict[str, Any]]:
     results = []
-    for portfile in PORTFILES_ROOT.glob("**/Portfile.yaml"):
-        meta = load_portfile(portfile)
-        if not meta:
-            continue
+    # resumos vindos do índice: só Portfiles novos/alterados são parseados
+    index = scan_ports(PORTFILES_ROOT, on_error=lambda pf, e: log(f"erro ao ler {pf}: {e}"))
+    for path, meta in index.items():
+        portfile = Path(path)
 
         name = meta.get("name", "")
         desc = meta.get("description", "")
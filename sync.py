@@ -16,6 +16,11 @@ from datetime import datetime
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 # Diretórios principais
 PORTFILES_ROOT = Path("/usr/ports")
 STATE_DIR = Path("/pyport/state")
@@ -28,10 +33,16 @@ SYNC_LOG = LOG_DIR / "sync.log"
 SYNC_STATE = STATE_DIR / "sync.json"
 
 
+_log_file = None
+
+
 def log(msg: str):
+    global _log_file
     print(f"[sync] {msg}")
-    with open(SYNC_LOG, "a") as f:
-        f.write(msg + "\n")
+    if _log_file is None:
+        # aberto uma vez por processo; line-buffered e fechado na saída do interpretador
+        _log_file = open(SYNC_LOG, "a", buffering=1)
+    _log_file.write(msg + "\n")
 
 
 def notify(msg: str):
@@ -51,10 +62,25 @@ def load_config() -> dict:
         return {}
     try:
         with open(cfg_file) as f:
-            return yaml.safe_load(f) or {}
+            cfg = yaml.load(f, Loader=_YamlLoader) or {}
     except Exception as e:
         log(f"Erro carregando config: {e}")
         return {}
+    _intern_repos(cfg.get("repositories") or [])
+    return cfg
+
+
+def _intern_repos(repos: list):
+    """
+    Interna chaves e valores repetidos (type, branch) das entradas de repositório.
+    """
+    for i, r in enumerate(repos):
+        if not isinstance(r, dict):
+            continue
+        r = repos[i] = {sys.intern(k) if isinstance(k, str) else k: v for k, v in r.items()}
+        for field in ("type", "branch"):
+            if isinstance(r.get(field), str):
+                r[field] = sys.intern(r[field])
 
 
 def save_state(state: dict):
@@ -103,6 +129,13 @@ def sync_tarball(url: str, dest: Path, checksum: str = None):
     log(f"Baixado e extraído {url} em {dest}")
 
 
+def find_repository(repos: list, name: str):
+    """
+    Localiza um repositório pelo nome (o primeiro, se houver nomes repetidos).
+    """
+    return next((r for r in repos if r.get("name") == name), None)
+
+
 def sync_all(repo_name: str = None):
     cfg = load_config()
     repos = cfg.get("repositories", [])
@@ -111,6 +144,13 @@ def sync_all(repo_name: str = None):
         log("Nenhum repositório configurado.")
         return
 
+    if repo_name:
+        repo = find_repository(repos, repo_name)
+        if repo is None:
+            log(f"Repositório não encontrado: {repo_name}")
+            return
+        repos = [repo]
+
     state = get_state()
 
     for repo in repos:
@@ -119,9 +159,6 @@ def sync_all(repo_name: str = None):
         typ = repo.get("type", "git")
         checksum = repo.get("checksum")
 
-        if repo_name and repo_name != name:
-            continue
-
         dest = PORTFILES_ROOT / name
         try:
             if typ == "git":
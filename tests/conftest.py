@@ -0,0 +1,12 @@
+import sys
+import types
+from pathlib import Path
+
+# os módulos vivem na raiz do repositório e são instalados como o pacote "pyport"
+# (ver Makefile); aqui a raiz faz esse papel
+ROOT = Path(__file__).resolve().parent.parent
+
+if "pyport" not in sys.modules:
+    _pkg = types.ModuleType("pyport")
+    _pkg.__path__ = [str(ROOT)]
+    sys.modules["pyport"] = _pkg
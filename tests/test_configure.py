@@ -0,0 +1,75 @@
+import shutil
+import stat
+
+import pytest
+
+# configure (e hooks) importam pyport.sandbox.Sandbox; sem ela não há o que testar
+if not hasattr(pytest.importorskip("pyport.sandbox"), "Sandbox"):
+    pytest.skip("pyport.sandbox não define Sandbox", allow_module_level=True)
+
+from pyport.configure import configure, _detect_system  # noqa: E402
+
+
+def _port(tmp_path, **extra):
+    # toolchain inexistente: o ambiente só muda quando o port define flags
+    port = {"name": "demo", "path": str(tmp_path), "toolchain": str(tmp_path / "no-tools")}
+    port.update(extra)
+    return port
+
+
+def _autotools_tree(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    script = src / "configure"
+    script.write_text('#!/bin/sh\necho "$@" > configured.txt\necho "CFLAGS=$CFLAGS" >> configured.txt\n')
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    return src
+
+
+def test_configure_autotools_runs_and_caches(tmp_path):
+    src = _autotools_tree(tmp_path)
+    port = _port(tmp_path, configure_args=["--disable-nls"])
+
+    configure(port, src)
+
+    out = (src / "configured.txt").read_text()
+    assert "--prefix=/usr --disable-nls" in out
+    assert (src / ".configure_done").exists()
+
+    # mesmo ambiente: o segundo configure é pulado
+    (src / "configured.txt").unlink()
+    configure(port, src)
+    assert not (src / "configured.txt").exists()
+
+    configure(port, src, force=True)
+    assert (src / "configured.txt").exists()
+
+
+def test_configure_passes_port_flags(tmp_path):
+    src = _autotools_tree(tmp_path)
+
+    configure(_port(tmp_path, cflags="-O2 -pipe"), src)
+
+    assert "CFLAGS=-O2 -pipe" in (src / "configured.txt").read_text()
+
+
+@pytest.mark.skipif(shutil.which("cmake") is None, reason="cmake não instalado")
+def test_configure_cmake(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "CMakeLists.txt").write_text("cmake_minimum_required(VERSION 3.5)\nproject(demo NONE)\n")
+
+    assert _detect_system(src) == "cmake"
+    configure(_port(tmp_path), src)
+
+    assert (src / "CMakeCache.txt").exists()
+    assert (src / ".configure_done").exists()
+
+
+def test_configure_custom_without_markers(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+
+    configure(_port(tmp_path), src)
+
+    assert (src / ".configure_done").exists()
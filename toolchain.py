@@ -22,6 +22,8 @@ import json
 import shutil
 import subprocess
 import time
+import ctypes
+import ctypes.util
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
@@ -39,6 +41,43 @@ def _run(cmd: List[str], cwd: Optional[Path] = None, check: bool = True, capture
         LOG.debug(f"stderr: {result.stderr}")
     return result
 
+# mount(2)/umount2(2) direto da libc: sem um fork+exec de mount/umount por ponto de montagem
+_MS_RDONLY = 1
+_MS_REMOUNT = 32
+_MS_BIND = 4096
+_MNT_DETACH = 2
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    # assinaturas explícitas: flags é unsigned long e data um ponteiro (NULL), não int
+    _libc.mount.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_ulong, ctypes.c_void_p)
+    _libc.mount.restype = ctypes.c_int
+    _libc.umount2.argtypes = (ctypes.c_char_p, ctypes.c_int)
+    _libc.umount2.restype = ctypes.c_int
+except (OSError, AttributeError):
+    _libc = None
+
+def _mount(argv: List[str], src: Optional[str], target: Path, fstype: Optional[str] = None, flags: int = 0):
+    """mount(2) quando a libc está disponível; senão executa `argv` (o comando mount equivalente)."""
+    if _libc is None:
+        _run(argv, check=True)
+        return
+    LOG.info(f"[toolchain] mount(2): {src} -> {target}")
+    ret = _libc.mount(src.encode() if src else None, str(target).encode(),
+                      fstype.encode() if fstype else None, flags, None)
+    if ret != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"mount {src} -> {target}: {os.strerror(err)}")
+
+def _umount_lazy(target: Path):
+    """Equivalente a `umount -l`; erros são ignorados (como check=False)."""
+    if _libc is None:
+        _run(["umount", "-l", str(target)], check=False)
+        return
+    LOG.info(f"[toolchain] umount2(2): {target}")
+    if _libc.umount2(str(target).encode(), _MNT_DETACH) != 0:
+        LOG.debug(f"umount {target}: {os.strerror(ctypes.get_errno())}")
+
 def ensure_root():
     if os.geteuid() != 0:
         raise PermissionError("Operation requires root privileges. Re-run as root or with sudo.")
@@ -173,11 +212,11 @@ class ToolchainManager:
             for src, tgt_sub in [("/proc", "proc"), ("/sys", "sys"), ("/dev", "dev")]:
                 tgt = dest / tgt_sub
                 tgt.mkdir(parents=True, exist_ok=True)
-                _run(["mount", "--bind", src, str(tgt)], check=True)
+                _mount(["mount", "--bind", src, str(tgt)], src, tgt, flags=_MS_BIND)
             # dev/pts
             pts = dest / "dev" / "pts"
             pts.mkdir(parents=True, exist_ok=True)
-            _run(["mount", "-t", "devpts", "devpts", str(pts)], check=True)
+            _mount(["mount", "-t", "devpts", "devpts", str(pts)], "devpts", pts, fstype="devpts")
             # bind-ro extras
             if bind_ro:
                 for p in bind_ro:
@@ -186,8 +225,9 @@ class ToolchainManager:
                         continue
                     target = dest / p.relative_to("/")
                     target.parent.mkdir(parents=True, exist_ok=True)
-                    _run(["mount", "--bind", str(p), str(target)], check=True)
-                    _run(["mount", "-o", "remount,ro,bind", str(target)], check=True)
+                    _mount(["mount", "--bind", str(p), str(target)], str(p), target, flags=_MS_BIND)
+                    _mount(["mount", "-o", "remount,ro,bind", str(target)], None, target,
+                           flags=_MS_REMOUNT | _MS_BIND | _MS_RDONLY)
             # resolv.conf
             if copy_resolv:
                 etcdir = dest / "etc"
@@ -213,12 +253,12 @@ class ToolchainManager:
             for subp in ["dev/pts","proc","sys","dev"]:
                 m = dest / subp
                 if m.exists():
-                    _run(["umount", "-l", str(m)], check=False)
+                    _umount_lazy(m)
             if bind_ro:
                 for p in bind_ro:
                     target = dest / Path(p).relative_to("/")
                     if target.exists():
-                        _run(["umount", "-l", str(target)], check=False)
+                        _umount_lazy(target)
             LOG.info(f"Chroot unprepared at {dest}")
             return True
         except Exception as e:
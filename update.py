@@ -14,6 +14,15 @@ from pathlib import Path
 from typing import Dict, Any, List
 import yaml
 import requests
+try:
+    from pyport.portindex import iter_portfiles
+except ImportError:  # executado direto da árvore, fora do pacote
+    from portindex import iter_portfiles
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 PORTFILES_ROOT = Path("/usr/ports")
 LOG_DIR = Path("/pyport/logs")
@@ -26,8 +35,7 @@ def log(msg: str):
 
 
 def load_portfile(portfile: Path) -> Dict[str, Any]:
-    with open(portfile) as f:
-        return yaml.safe_load(f)
+    return yaml.load(Path(portfile).read_bytes(), Loader=_YamlLoader)
 
 
 def get_latest_from_git(url: str) -> str:
@@ -62,7 +70,8 @@ def get_latest_from_http(url: str) -> str:
 
 def check_updates():
     updates = {}
-    for portfile in PORTFILES_ROOT.glob("**/Portfile.yaml"):
+    for entry in iter_portfiles(PORTFILES_ROOT):
+        portfile = Path(entry.path)
         meta = load_portfile(portfile)
         name, version = meta["name"], meta["version"]
         log(f"checando {name} (atual {version})")